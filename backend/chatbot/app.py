@@ -2,11 +2,24 @@
 from dotenv import load_dotenv
 load_dotenv()
 import os
-from flask import Flask, request, jsonify
+import hmac
+import json
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from graph import chat_graph
+from graph import chat_graph, chat_input
+from logging_config import bind_request, get_logger, summarize
+import profiler
+import batch
+import recommender
+import speculation
+import wire
 import uuid
+
+log = get_logger("app")
 CORS_ORIGIN = os.getenv("CORS_ORIGIN")
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN")
+BATCH_TOKEN = os.getenv("BATCH_TOKEN")
+BATCH_MAX_MESSAGES = int(os.getenv("CHAT_BATCH_MAX_MESSAGES", "20000"))
 
 app = Flask(__name__)
 
@@ -16,6 +29,9 @@ CORS(
     resources={r"/api/*": {"origins": CORS_ORIGIN}},
     supports_credentials=True
 )
+wire.init_app(app)
+# Build the similar-products index in the background before the first fallback needs it
+recommender.index.start()
 
 @app.route("/api/chat", methods=["POST"])
 def chat():
@@ -26,45 +42,36 @@ def chat():
     if not auth_token:
         auth_token = ""
     user_id = data.get("user_id", "default_user")
+    bind_request(user_id)
     
     # Prepare state
-    initial_state = {
-        "user_id": user_id,
-        "user_message": user_message,
-        "chat": True,      
-        "tryon": False,
-        "product_filters": [],
-        "order_filters": [],
-        "product_reply": "",
-        "order_reply": "",
-        "products": [],
-        "orders": [],
-        "response": [],
-        "authToken": auth_token 
-    }
+    initial_state = chat_input(user_message, user_id, auth_token)
     
     # IMPORTANT: Config must include thread_id for checkpointer
     config = {"configurable": {"thread_id": user_id}}
     
     try:
         # Invoke the graph with config
-        result = chat_graph.invoke(initial_state, config=config)
+        try:
+            result = chat_graph.invoke(initial_state, config=config)
+        finally:
+            profiler.request_finished()
         #print("App results: ",result)
         response_list = result.get("response", [])
-        print("Final Response: ",response_list)
-        return jsonify({
+        log.debug("Final response: %s", summarize(response_list))
+        return wire.respond({
             "responses": response_list,
             "filters": result.get("filters", [])
-        })
+        }, kind=wire.response_type(response_list))
     except Exception as e:
-        print(f"Error in chat endpoint: {e}")
-        return jsonify({
+        log.exception("Error in chat endpoint: %s", e)
+        return wire.respond({
             "responses": [{
                 "type": "text",
                 "message": "I'm having trouble processing your request right now. Please try again."
             }],
             "error": str(e)
-        }), 500
+        }, kind="error", status=500)
 
 @app.route("/api/tryon", methods=["POST"])
 def virtual_try_on():
@@ -79,6 +86,8 @@ def virtual_try_on():
         if not product_name:
             return jsonify({"error": "Product name is required"}), 400
 
+        bind_request(request.form.get("user_id"))
+
         # Convert image to bytes (important)
         image_bytes = image_file.read()
 
@@ -91,13 +100,16 @@ def virtual_try_on():
         }
 
         # Run the graph
-        final_state = chat_graph.invoke(initial_state)
+        try:
+            final_state = chat_graph.invoke(initial_state)
+        finally:
+            profiler.request_finished()
 
         # Graph returns structured response list
-        return jsonify(final_state["response"])
+        return wire.respond(final_state["response"], kind="tryon")
 
     except Exception as e:
-        print("Error in try-on:", e)
+        log.exception("Error in try-on: %s", e)
         return jsonify({
             "error": "Try-on failed",
             "details": str(e)
@@ -118,6 +130,83 @@ def clear_chat():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/chat/stats", methods=["GET"])
+def chat_stats():
+    """Speculative product prefetch counters and response size/encode metrics"""
+    return jsonify({"speculation": speculation.stats(), "wire": wire.stats()})
+
+def _bearer_authorized(token):
+    header = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+
+@app.route("/api/chat/batch", methods=["POST"])
+def chat_batch():
+    """
+    Run a list of messages through the graph in parallel, for offline
+    evaluation. Body: {"messages": ["...", {"message": "...", "id": ...}],
+    "concurrency": 8}. Streams NDJSON: one result per message as it
+    finishes, then a summary (see batch.py).
+    """
+    if not _bearer_authorized(BATCH_TOKEN):
+        return jsonify({"error": "Unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    messages = data.get("messages")
+    if not isinstance(messages, list) or not messages:
+        return jsonify({"error": "messages must be a non-empty list"}), 400
+    if len(messages) > BATCH_MAX_MESSAGES:
+        return jsonify({"error": f"at most {BATCH_MAX_MESSAGES} messages per batch"}), 400
+    try:
+        concurrency = int(data.get("concurrency", 8))
+    except (TypeError, ValueError):
+        return jsonify({"error": "concurrency must be an integer"}), 400
+
+    def generate():
+        for record in batch.run_batch(messages, concurrency):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def _profiler_authorized():
+    return _bearer_authorized(PROFILER_TOKEN)
+
+def _profile_response(result):
+    if request.args.get("format") == "collapsed":
+        return (result or {}).get("collapsed", ""), 200, {"Content-Type": "text/plain; charset=utf-8"}
+    return jsonify(result or {"status": "idle"})
+
+@app.route("/api/admin/profile", methods=["POST"])
+def start_profile():
+    """
+    Start a sampling profile. Body: {"seconds": N} blocks for N seconds and
+    returns the result; {"requests": N} returns immediately and profiles the
+    next N graph invocations (poll GET /api/admin/profile).
+    ?format=collapsed returns flamegraph collapsed stacks as text.
+    """
+    if not _profiler_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        interval_ms = profiler.positive_number(data.get("intervalMs", profiler.DEFAULT_INTERVAL * 1000), "intervalMs")
+        session = profiler.start(
+            seconds=data.get("seconds"),
+            requests=data.get("requests"),
+            interval=interval_ms / 1000,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    if data.get("requests"):
+        return jsonify({"status": "running"}), 202
+    return _profile_response(profiler.wait(session))
+
+@app.route("/api/admin/profile", methods=["GET"])
+def get_profile():
+    """Result of the running or most recent profiling session."""
+    if not _profiler_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    return _profile_response(profiler.status())
+
 @app.route("/api/health", methods=["GET"])
 def health():
     """Health check endpoint"""
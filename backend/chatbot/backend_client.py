@@ -0,0 +1,76 @@
+# backend_client.py
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import transport
+
+BACKEND_URL = os.getenv("NODE_BACKEND_URL")
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "256"))
+
+# One pooled session for all calls to the Node backend
+session = transport.http_session()
+
+# (url, params) -> (etag, payload); most recently used last
+_catalog_cache = OrderedDict()
+_catalog_lock = threading.Lock()
+
+
+def _cache_key(url, params):
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if v is not None)
+    return url, tuple(items)
+
+
+def _get_cached(path, params, timeout, parse, stream=False):
+    url = f"{BACKEND_URL}{path}"
+    key = _cache_key(url, params)
+
+    headers = {}
+    with _catalog_lock:
+        cached = _catalog_cache.get(key)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    res = session.get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+    if res.status_code == 304 and cached:
+        res.close()
+        with _catalog_lock:
+            if key in _catalog_cache:
+                _catalog_cache.move_to_end(key)
+        return cached[1]
+
+    res.raise_for_status()
+    payload = parse(res)
+    etag = res.headers.get("ETag")
+    if etag:
+        with _catalog_lock:
+            _catalog_cache[key] = (etag, payload)
+            _catalog_cache.move_to_end(key)
+            while len(_catalog_cache) > CATALOG_CACHE_SIZE:
+                _catalog_cache.popitem(last=False)
+    return payload
+
+
+def get_catalog(path, params=None, timeout=5):
+    """
+    GET a public catalog endpoint (/products, /categories, ...).
+    Sends If-None-Match with the last ETag seen for the same query and reuses
+    the cached payload on 304, so repeated queries skip the backend's DB work.
+    """
+    return _get_cached(path, params, timeout, lambda res: res.json())
+
+
+def _parse_ndjson(res):
+    with res:
+        return [json.loads(line) for line in res.iter_lines() if line]
+
+
+def export_catalog(category=None, timeout=30):
+    """
+    Whole catalog (optionally one category) as a list of products, read from
+    the streaming /products/export endpoint in a single request. Revalidated
+    with ETags like get_catalog, so an unchanged catalog costs one 304.
+    """
+    params = {"category": category} if category else None
+    return _get_cached("/products/export", params, timeout, _parse_ndjson, stream=True)
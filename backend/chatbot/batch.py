@@ -0,0 +1,181 @@
+# batch.py
+"""
+Run many chat messages through chat_graph with bounded parallelism.
+
+Used by POST /api/chat/batch and from the command line for offline
+evaluation of routing and filter extraction:
+
+    python batch.py messages.jsonl --concurrency 16 > results.jsonl
+
+Input is one message per line, either plain text or a JSON object
+{"message": ..., "id": ..., "user_id": ..., "authToken": ...}. Output is
+NDJSON: one "result" line per message in completion order (with its input
+index, timing, intents, filters and responses), then a "summary" line.
+
+Everything runs in this process, so the LLM client, the pooled HTTP sessions,
+the catalog ETag cache and the recommender index are shared by all workers.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from graph import chat_graph, chat_input
+from logging_config import bind_request, get_logger
+import profiler
+
+log = get_logger("batch")
+
+MAX_CONCURRENCY = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", "32"))
+
+
+def normalize_item(item, index):
+    if isinstance(item, str):
+        item = {"message": item}
+    if not isinstance(item, dict) or not isinstance(item.get("message"), str) or not item["message"].strip():
+        raise ValueError(f"item {index}: expected a non-empty message")
+    return item
+
+
+def _run_one(index, raw):
+    item = raw if isinstance(raw, dict) else {"message": raw}
+    user_id = item.get("user_id") or f"batch-{index}"
+    bind_request(user_id)
+    start = time.perf_counter()
+    try:
+        item = normalize_item(raw, index)
+        result = chat_graph.invoke(
+            chat_input(item["message"], user_id, item.get("authToken")),
+            config={"configurable": {"thread_id": user_id}},
+        )
+        ok, error = True, None
+    except ValueError as e:
+        result, ok, error = {}, False, str(e)
+    except Exception as e:
+        log.exception("Batch item %d failed: %s", index, e)
+        result, ok, error = {}, False, str(e)
+    finally:
+        profiler.request_finished()
+    return {
+        "type": "result",
+        "index": index,
+        "id": item.get("id"),
+        "message": item.get("message"),
+        "ok": ok,
+        "error": error,
+        "elapsedMs": round((time.perf_counter() - start) * 1000, 1),
+        "intents": {"product": bool(result.get("product_intent")), "order": bool(result.get("order_intent"))},
+        "category": result.get("category"),
+        "productFilters": result.get("product_filters", []),
+        "orderFilters": result.get("order_filters", []),
+        "responses": result.get("response", []),
+    }
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _summary(results, wall):
+    times = sorted(r["elapsedMs"] for r in results)
+    ok = sum(1 for r in results if r["ok"])
+    return {
+        "type": "summary",
+        "count": len(results),
+        "ok": ok,
+        "failed": len(results) - ok,
+        "wallMs": round(wall * 1000, 1),
+        "throughputPerSec": round(len(results) / wall, 2) if wall > 0 else None,
+        "latencyMs": {
+            "mean": round(sum(times) / len(times), 1) if times else None,
+            "p50": _percentile(times, 0.5),
+            "p95": _percentile(times, 0.95),
+            "max": times[-1] if times else None,
+        },
+        "intents": {
+            "product": sum(1 for r in results if r["intents"]["product"]),
+            "order": sum(1 for r in results if r["intents"]["order"]),
+            "none": sum(1 for r in results if not any(r["intents"].values())),
+        },
+    }
+
+
+def run_batch(items, concurrency=8):
+    """
+    Yield a result dict per item as it completes, then a summary dict.
+    `items` may be any iterable (e.g. a file being read); at most
+    2 * concurrency of them are pulled ahead of the workers.
+    """
+    concurrency = max(1, min(int(concurrency), MAX_CONCURRENCY))
+    source = iter(enumerate(items))
+    results = []
+    pending = set()
+    started = time.perf_counter()
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="chat-batch")
+    try:
+        def fill():
+            while len(pending) < concurrency * 2:
+                try:
+                    index, item = next(source)
+                except StopIteration:
+                    return
+                pending.add(executor.submit(_run_one, index, item))
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                result = future.result()
+                results.append(result)
+                yield result
+            fill()
+    finally:
+        # Also reached when a streaming client disconnects mid-run.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    summary = _summary(results, time.perf_counter() - started)
+    log.info("Batch finished: %d messages, %d failed, %.1fs",
+             summary["count"], summary["failed"], summary["wallMs"] / 1000)
+    yield summary
+
+
+def _read_items(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        yield json.loads(line) if line.startswith("{") else line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run chat messages through the chatbot graph in parallel.")
+    parser.add_argument("input", help="messages file (JSONL or one message per line), or - for stdin")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-o", "--output", help="write NDJSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for record in run_batch(_read_items(src), args.concurrency):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if record["type"] == "summary":
+                print(json.dumps(record, indent=2), file=sys.stderr)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
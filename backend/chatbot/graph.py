@@ -10,8 +10,15 @@ from typing_extensions import Annotated
 from langgraph.graph import StateGraph, END
 import os
 import json
-import requests
 from openai import OpenAI  # Used only as Groq-compatible client
+import transport
+from logging_config import get_logger, summarize
+from backend_client import get_catalog
+import speculation
+import recommender
+import profiler
+
+log = get_logger("graph")
 
 # =========================================================
 # CONFIG
@@ -19,15 +26,19 @@ from openai import OpenAI  # Used only as Groq-compatible client
 GROQ_API_KEY = os.getenv("GROK_API_KEY")
 BACKEND_URL = os.getenv("NODE_BACKEND_URL")
 TRY_ON_API_KEY = os.getenv("TRY_ON_API_KEY")
-print("GROQ KEY FOUND:", GROQ_API_KEY is not None)
-print("TRY_ON_API_KEY:", TRY_ON_API_KEY is not None)
+log.info("GROQ key found: %s", GROQ_API_KEY is not None)
+log.info("Try-on key found: %s", TRY_ON_API_KEY is not None)
 
 # Groq uses OpenAI-compatible SDK
 client = OpenAI(
     api_key=GROQ_API_KEY,
-    base_url="https://api.groq.com/openai/v1"
+    base_url="https://api.groq.com/openai/v1",
+    http_client=transport.httpx_client()
 )
 
+# Orders, try-on and image downloads; backend catalog calls use backend_client
+http = transport.http_session()
+
 def overwrite(_, new):
     return new
 
@@ -78,6 +89,7 @@ class ChatState(TypedDict):
     products: Annotated[Optional[List[dict]], operator.add]
     product_reply: Annotated[dict, merge_dict]
     category: Annotated[str, overwrite]
+    speculation_id: Annotated[Optional[str], overwrite]
 
     # ORDER PIPELINE
     order_filters: Annotated[Optional[List[dict]], operator.add]
@@ -95,6 +107,24 @@ class ChatState(TypedDict):
     _next_nodes: Annotated[Optional[List[str]], overwrite]
     chat_next_nodes: Annotated[Optional[List[str]], overwrite]
 
+
+def chat_input(user_message, user_id="default_user", auth_token=None) -> ChatState:
+    """Initial state for a chat turn (shared by /api/chat and batch runs)."""
+    return {
+        "user_id": user_id,
+        "user_message": user_message,
+        "chat": True,
+        "tryon": False,
+        "product_filters": [],
+        "order_filters": [],
+        "product_reply": "",
+        "order_reply": "",
+        "products": [],
+        "orders": [],
+        "response": [],
+        "authToken": auth_token or "",
+    }
+
 # =========================================================
 # NODE 1 — FILTER EXTRACTION
 # =========================================================
@@ -137,7 +167,7 @@ User message: "{state['user_message']}"
         #print("User message: ",state['user_message'])
         #print("res: ",res)
         content = res.choices[0].message.content.strip()
-        print("Grok Product response:", content)
+        log.debug("Product filter LLM response: %s", summarize(content))
         
         if content.startswith("```"):
             content = content.split("```")[1]
@@ -158,7 +188,7 @@ User message: "{state['user_message']}"
         filters = clean_filters
         #print("Filters: ",filters)
     except Exception as e:
-        print("Filter extraction error:", e)
+        log.warning("Filter extraction error: %s", e)
         filters = []
 
     return {**state, "product_filters": filters or []}
@@ -169,6 +199,7 @@ User message: "{state['user_message']}"
 def fetch_products(state: ChatState) -> ChatState:
     #print("fetch_products")
     raw_filters = state.get("product_filters", [])
+    spec_id = state.get("speculation_id")
     all_products = []
 
     for f in raw_filters:
@@ -176,23 +207,42 @@ def fetch_products(state: ChatState) -> ChatState:
             on_sale_requested = f.pop("on_sale", None)
             #print("Params f: ",f)
             #print("URL: ",f"{BACKEND_URL}/products",f)
-            res = requests.get(f"{BACKEND_URL}/products", params=f, timeout=5)
-            res.raise_for_status()
-            items = res.json().get("items",[])
+            # Reuse the speculative prefetch from chat_node when it covers f
+            items = speculation.narrow(spec_id, f)
+            if items is None:
+                items = get_catalog("/products", params=f).get("items", [])
             #print("ITEMS: ",items)
             if on_sale_requested:
                 items = [p for p in items if p.get("sale")]
             all_products.extend(items)
             #print("Items: ",all_products)
         except Exception as e:
-            print("Backend API error:", e)
+            log.warning("Backend API error: %s", e)
 
-    return {**state, "products": all_products or []}
+    speculation.release(spec_id)
+    return {**state, "products": all_products or [], "speculation_id": None}
 
 
 # =========================================================
 # NODE 3 — GENERATE RESPONSE
 # =========================================================
+def product_card(p):
+    """Trim a backend product to what the chat frontend renders."""
+    return {
+        "id": p["id"],
+        "name": p["name"],
+        "price": p["price"],
+        "originalPrice": p.get("originalPrice", p["price"]),
+        "image": p.get("image"),
+        "thumbnails": p.get("thumbnails", {}),
+        "sale": p.get("sale", False),
+        "discount": p.get("discount", 0),
+        "fabric": p.get("fabric", "Premium Fabric"),
+        "colors": p.get("colors", []),
+        "sizes": p.get("sizes", [])
+    }
+
+
 def generate_product_response(state: ChatState) -> ChatState:
     #print("generate_product_response")
 
@@ -206,13 +256,19 @@ def generate_product_response(state: ChatState) -> ChatState:
         #print("IN if not products")
         if category:
             #print("IN if category")
+            # Rank the catalog against the unmet filters locally; the LLM
+            # only has to phrase the reply.
             try:
-                res = requests.get(f"{BACKEND_URL}/products?category={category}", timeout=5)
-                res.raise_for_status()
-                alt_products = res.json().get("items", [])
+                alt_products = recommender.index.similar(state.get("product_filters"), category, k=8)
             except Exception as e:
-                print("Error fetching category products:", e)
-                alt_products = []
+                log.warning("Recommender error, falling back to category listing: %s", e)
+                try:
+                    alt_products = get_catalog("/products", params={"category": category}).get("items", [])[:8]
+                except Exception as e:
+                    log.warning("Error fetching category products: %s", e)
+                    alt_products = []
+            alt_products = [product_card(p) for p in alt_products]
+            alt_context = "\n".join(f"- {p['name']} (Rs {p['price']})" for p in alt_products)
 
             # 3. Prepare prompt for LLM
             prompt = f"""
@@ -221,7 +277,8 @@ def generate_product_response(state: ChatState) -> ChatState:
         User: "{user_msg}"
 
         We don't have the exact product the user requested.
-        - Suggested products in the same category: {alt_products if alt_products else 'None'}
+        - Closest alternatives we have (best match first):
+{alt_context if alt_products else 'None'}
         - If products are not avialable suggest other categories one of: ["women","men","kids","accessories","fragrances"]
         Write a friendly, short message to the user explaining this.
         """
@@ -254,21 +311,7 @@ def generate_product_response(state: ChatState) -> ChatState:
     # CASE 2 — Products found → SEND STRUCTURED DATA
     else:
         # Trim to what frontend needs (important!)
-        cleaned_products = [
-            {
-                "id": p["id"],
-                "name": p["name"],
-                "price": p["price"],
-                "originalPrice": p.get("originalPrice", p["price"]),
-                "image": p.get("image"),
-                "sale": p.get("sale", False),
-                "discount": p.get("discount", 0),
-                "fabric": p.get("fabric", "Premium Fabric"),
-                "colors": p.get("colors", []),
-                "sizes": p.get("sizes", [])
-            }
-            for p in products[:8]
-        ]
+        cleaned_products = [product_card(p) for p in products[:8]]
 
         product_context = "\n".join(
             f"- {p['name']} (Rs {p['price']}) | Colors: {', '.join(p.get('colors', []))} | Sizes: {', '.join(p.get('sizes', []))}"
@@ -347,7 +390,7 @@ User message: "{state['user_message']}"
         )
 
         content = res.choices[0].message.content.strip()
-        print("Grok order response:", content)
+        log.debug("Order filter LLM response: %s", summarize(content))
 
         if content.startswith("```"):
             content = content.split("```")[1]
@@ -370,7 +413,7 @@ User message: "{state['user_message']}"
         #print("Order Filters: ", filters)
 
     except Exception as e:
-        print("Order filter extraction error:", e)
+        log.warning("Order filter extraction error: %s", e)
         filters = []
 
     return {**state, "order_filters": filters or {}}
@@ -402,7 +445,7 @@ def fetch_orders(state: ChatState) -> ChatState:
                     # Fetch a specific order
                     order_number = f["orderNumber"]
                     url = f"{BACKEND_URL}/orders/{order_number}"
-                    res = requests.get(url, headers=headers, timeout=5)
+                    res = http.get(url, headers=headers, timeout=5)
                     res.raise_for_status()
                     order = res.json().get("order")
                     if order:
@@ -411,16 +454,16 @@ def fetch_orders(state: ChatState) -> ChatState:
                 elif f.get("all_orders"):
                     # Fetch all orders for the user
                     url = f"{BACKEND_URL}/me/orders"
-                    res = requests.get(url, headers=headers, timeout=5)
+                    res = http.get(url, headers=headers, timeout=5)
                     res.raise_for_status()
                     orders = res.json().get("orders", [])
                     all_orders.extend(orders)
 
                 else:
-                    print("No valid order filter found:", f)
+                    log.info("No valid order filter found: %s", summarize(f))
 
             except Exception as e:
-                print("Backend API error (orders):", e)
+                log.warning("Backend API error (orders): %s", e)
         #print("all_orders: ",all_orders)
         return {**state, "orders": all_orders,"login_required": login_required}
     
@@ -522,7 +565,7 @@ def super_node(state: ChatState) -> ChatState:
     return state
 
 def tryon_node(state: ChatState) -> ChatState:
-    print("tryon_node started")
+    log.info("tryon_node started")
 
     user_input = state.get("product_name")
     user_image_file = state.get("uploaded_image")
@@ -543,13 +586,11 @@ def tryon_node(state: ChatState) -> ChatState:
         scorer=fuzz.token_sort_ratio
     )
     corrected_name = match if score > 70 else user_input
-    print("Corrected product:", corrected_name)
+    log.info("Corrected product: %s", corrected_name)
 
     # ------------------ Fetch product ------------------
     try:
-        res = requests.get(f"{BACKEND_URL}/products", params={"q": corrected_name}, timeout=5)
-        res.raise_for_status()
-        products = res.json().get("items", [])
+        products = get_catalog("/products", params={"q": corrected_name}).get("items", [])
 
         if not products:
             state["tryon_error"] = "Product not found."
@@ -559,20 +600,21 @@ def tryon_node(state: ChatState) -> ChatState:
 
         # Get product image and metadata
         product_image_url = product.get("image")
-        print("product_image_url: ",product_image_url)
+        log.debug("Product image url: %s", product_image_url)
         if not product_image_url:
             state["tryon_error"] = "Product image missing."
             return state
 
-        # Download product image
-        product_res = requests.get(product_image_url, timeout=5)
+        # Download product image; the 960px JPEG derivative is plenty for try-on
+        # and much smaller than most originals (the backend redirects to the
+        # original when it cannot resize).
+        thumbnail_url = (product.get("thumbnails") or {}).get("960")
+        product_res = http.get(thumbnail_url or product_image_url, headers={"Accept": "image/jpeg"}, timeout=5)
         product_res.raise_for_status()
         product_bytes = product_res.content
-        print("product_bytes: ",product_bytes)
         img = Image.open(BytesIO(product_bytes))
-        print("PRODUCT FORMAT:", img.format)
-        print("PRODUCT MODE:", img.mode)
-        print("PRODUCT SIZE:", img.size)
+        log.debug("Product image %s format=%s mode=%s size=%s",
+                  summarize(product_bytes), img.format, img.mode, img.size)
     except Exception as e:
         state["tryon_error"] = f"Product fetch error: {e}"
         return state
@@ -585,7 +627,7 @@ def tryon_node(state: ChatState) -> ChatState:
         }
 
         # Submit job
-        response = requests.post(
+        response = http.post(
             "https://tryon-api.com/api/v1/tryon",  # <-- real endpoint
             headers=headers,
             files=files
@@ -595,7 +637,7 @@ def tryon_node(state: ChatState) -> ChatState:
         job_id = data["jobId"]
         status_url = data["statusUrl"]
 
-        print(f"Try-On job submitted: {job_id}")
+        log.info("Try-On job submitted: %s", job_id)
 
         # Poll for completion with timeout
         job_status = "processing"
@@ -603,10 +645,10 @@ def tryon_node(state: ChatState) -> ChatState:
         result_url = None
         poll_start = time.time()
         timeout_seconds = 120  # max 2 minutes to wait
-        print("Waiting 30 seconds for the job to start processing...")
-        time.sleep(30)
+        log.info("Waiting 30 seconds for the job to start processing")
+        transport.sleep(30)
         while True:
-            status_response = requests.get(f"https://tryon-api.com{status_url}", headers=headers)
+            status_response = http.get(f"https://tryon-api.com{status_url}", headers=headers)
             status_response.raise_for_status()
             status_data = status_response.json()
 
@@ -623,20 +665,20 @@ def tryon_node(state: ChatState) -> ChatState:
                 raise Exception(f"Try-On job failed: {status_data.get('error')}")
             
             else:
-                print("Waiting 30 secs, Job Status: ",job_status)
-                time.sleep(30)
+                log.info("Waiting 30 secs, job status: %s", job_status)
+                transport.sleep(30)
 
         # Fetch image
         if result_b64:
             state["generated_image"] = result_b64
         elif result_url:
-            image_res = requests.get(result_url)
+            image_res = http.get(result_url)
             image_res.raise_for_status()
             state["generated_image"] = base64.b64encode(image_res.content).decode("utf-8")
         else:
             raise Exception("Try-On job did not return an image or URL.")
 
-        print("Try-On image generated successfully.")
+        log.info("Try-On image generated successfully")
 
 
     except Exception as e:
@@ -667,11 +709,13 @@ def chat_node(state: ChatState) -> ChatState:
 
     product_intent = any(k in user_msg for k in product_keywords)
     order_intent = any(k in user_msg for k in order_keywords)
-    print("Before loop Product_intent:", product_intent)
-    print("Before loop Order_intent:", order_intent)
+
+    # Start fetching likely products now so the backend call overlaps with
+    # the filter-extraction LLM call; fetch_products narrows or discards it.
+    state["speculation_id"] = speculation.start_prefetch(user_msg) if product_intent else None
+    log.debug("Keyword intents: product=%s order=%s", product_intent, order_intent, extra={"sample": 0.1})
     # If both intents are False (ambiguous), ask the model
     if not (product_intent or order_intent):
-        print("Inside loop")
         try:
             response = client.chat.completions.create(
                 model="openai/gpt-oss-120b",
@@ -683,7 +727,7 @@ def chat_node(state: ChatState) -> ChatState:
             )
             
             model_text = response.choices[0].message.content.strip().lower()
-            print("model_text: ",model_text)
+            log.debug("Intent LLM response: %s", summarize(model_text))
             # Simple logic based on model text
             if "product" in model_text:
                 product_intent = True
@@ -691,15 +735,14 @@ def chat_node(state: ChatState) -> ChatState:
                 order_intent = True
 
         except Exception as e:
-            print("LLM intent detection error:", e)
+            log.warning("LLM intent detection error: %s", e)
             # fallback to keywords only
 
     # Store final intents
     state["product_intent"] = product_intent
     state["order_intent"] = order_intent
 
-    print("After Product_intent:", product_intent)
-    print("After Order_intent:", order_intent)
+    log.info("Intents: product=%s order=%s", product_intent, order_intent)
 
     return state
 
@@ -712,7 +755,7 @@ def super_node_router(state: ChatState) -> list[str]:
         next_nodes.append("tryon_node")
     if not next_nodes:
         next_nodes.append("response_synthesizer")
-    print("super next_nodes : ",next_nodes)
+    log.debug("super next_nodes: %s", next_nodes, extra={"sample": 0.1})
     return next_nodes
 
 def chat_node_router(state: ChatState) -> list[str]:
@@ -723,7 +766,7 @@ def chat_node_router(state: ChatState) -> list[str]:
         next_nodes.append("extract_order_filters")
     if not next_nodes:
         next_nodes.append("response_synthesizer")
-    print("chat next_nodes : ",next_nodes)
+    log.debug("chat next_nodes: %s", next_nodes, extra={"sample": 0.1})
     return next_nodes
     
 # ------------------- RESPONSE NODE -------------------
@@ -735,7 +778,7 @@ def chat_response_synthesizer(state: ChatState) -> ChatState:
     #print("response_synthesizer")
 
     response_list = []
-    print("order_reply: ",state["order_reply"])
+    log.debug("order_reply: %s", summarize(state.get("order_reply")))
     # Add product reply if available
     if state.get("product_intent") and state.get("product_reply"):
         response_list.append(state["product_reply"])  # already a dict
@@ -752,7 +795,7 @@ def chat_response_synthesizer(state: ChatState) -> ChatState:
         })
 
     state["response"] = response_list
-    print("Done, response list length:", len(response_list))
+    log.info("Done, response list length: %d", len(response_list))
     return state
 
 
@@ -787,24 +830,28 @@ def tryon_response_node(state: ChatState) -> ChatState:
 # ------------------- GRAPH CONSTRUCTION -------------------
 graph = StateGraph(ChatState)
 
+def add_node(name, fn):
+    # Nodes report wall/CPU time to the profiler while a session is active
+    graph.add_node(name, profiler.instrument(name, fn))
+
 # ------------------- Nodes -------------------
-graph.add_node("super_node", super_node)
-graph.add_node("chat_node", chat_node)
-graph.add_node("tryon_node", tryon_node)
-graph.add_node("tryon_response_node",tryon_response_node)
+add_node("super_node", super_node)
+add_node("chat_node", chat_node)
+add_node("tryon_node", tryon_node)
+add_node("tryon_response_node", tryon_response_node)
 
 # Product pipeline
-graph.add_node("extract_product_filters", extract_product_filters)
-graph.add_node("fetch_products", fetch_products)
-graph.add_node("generate_product_response", generate_product_response)
+add_node("extract_product_filters", extract_product_filters)
+add_node("fetch_products", fetch_products)
+add_node("generate_product_response", generate_product_response)
 
 # Order pipeline
-graph.add_node("extract_order_filters", extract_order_filters)
-graph.add_node("fetch_orders", fetch_orders)
-graph.add_node("generate_order_response", generate_order_response)
+add_node("extract_order_filters", extract_order_filters)
+add_node("fetch_orders", fetch_orders)
+add_node("generate_order_response", generate_order_response)
 
 # Response synthesizer
-graph.add_node("chat_response_synthesizer", chat_response_synthesizer)
+add_node("chat_response_synthesizer", chat_response_synthesizer)
 
 # ------------------- Edges -------------------
 graph.set_entry_point("super_node")
@@ -0,0 +1,141 @@
+# logging_config.py
+"""
+Logging for the chatbot service.
+
+- Records are handed to a queue and written by a background listener
+  thread, so a request never blocks on stdout. Message formatting is also
+  deferred to that thread; always log with %-style args, not f-strings.
+- Levels: CHAT_LOG_LEVEL (default INFO) for everything, plus per-module
+  overrides, e.g. CHAT_LOG_LEVELS="chatbot.graph=DEBUG,chatbot.transport=WARNING".
+- CHAT_LOG_FORMAT=json writes one JSON object per line instead of text.
+- Every record carries the current request's correlation id (see bind_request).
+- High-volume debug events can pass extra={"sample": 0.05} to keep ~5% of them.
+- Wrap large payloads in summarize() so they are logged as size + hash or
+  truncated text, computed only if the record is actually emitted.
+"""
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+
+ROOT = "chatbot"
+MAX_TEXT = int(os.getenv("CHAT_LOG_MAX_CHARS", "300"))
+
+_request_id = contextvars.ContextVar("request_id", default="-")
+_listener = None
+
+
+def bind_request(user_id=None):
+    """Start a new correlation id for the current request, tied to user_id."""
+    rid = f"{user_id or 'anon'}:{uuid.uuid4().hex[:8]}"
+    _request_id.set(rid)
+    return rid
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+class summarize:
+    """Lazy, bounded rendering of a payload for log messages."""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit=MAX_TEXT):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        v = self.value
+        if isinstance(v, (bytes, bytearray, memoryview)):
+            data = bytes(v)
+            return f"<{len(data)} bytes sha1={hashlib.sha1(data).hexdigest()[:12]}>"
+        if not isinstance(v, str):
+            try:
+                v = json.dumps(v, default=str, ensure_ascii=False)
+            except (TypeError, ValueError):
+                v = repr(v)
+        if len(v) <= self.limit:
+            return v
+        return f"{v[:self.limit]}...(+{len(v) - self.limit} chars)"
+
+
+class _ContextFilter(logging.Filter):
+    """Adds request_id and applies per-record sampling."""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        rate = getattr(record, "sample", None)
+        return rate is None or random.random() < rate
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() formats the message on the calling thread; leave
+    # that to the listener so the hot path only pays for an enqueue.
+    def prepare(self, record):
+        return record
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def _parse_levels(spec):
+    levels = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """Idempotently configure the chatbot logger tree."""
+    global _listener
+    if _listener is not None:
+        return
+
+    if os.getenv("CHAT_LOG_FORMAT", "text").lower() == "json":
+        formatter = _JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(formatter)
+
+    q = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(q)
+    handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger(ROOT)
+    root.setLevel(os.getenv("CHAT_LOG_LEVEL", "INFO").upper())
+    root.addHandler(handler)
+    root.propagate = False
+    for name, level in _parse_levels(os.getenv("CHAT_LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(q, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(module):
+    """Logger for a chatbot module, e.g. get_logger("graph") -> chatbot.graph."""
+    setup_logging()
+    return logging.getLogger(f"{ROOT}.{module}")
@@ -0,0 +1,179 @@
+# profiler.py
+"""
+On-demand sampling profiler for the chatbot service.
+
+While a session is active a daemon thread snapshots every thread's Python
+stack (sys._current_frames) at a fixed interval and counts collapsed stacks,
+which is the input format of flamegraph.pl / speedscope. Graph nodes wrapped
+with instrument() also record per-node call counts, wall time and CPU time.
+
+Nothing runs while no session is active: there is no sampler thread and the
+node wrapper is a single None check.
+"""
+import functools
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.005
+MIN_INTERVAL = 0.001
+MAX_SECONDS = 120
+MAX_DEPTH = 128
+
+_lock = threading.Lock()
+_session = None
+_last_result = None
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Session:
+    def __init__(self, seconds, requests, interval):
+        self.started = time.time()
+        self.deadline = self.started + seconds if seconds else None
+        self.remaining = requests
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stacks = Counter()
+        self.samples = 0
+        self.nodes = {}
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _run(self):
+        me = threading.get_ident()
+        try:
+            while not self.done.is_set():
+                if self.deadline and time.time() >= self.deadline:
+                    break
+                sample = []
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    labels = []
+                    while frame is not None and len(labels) < MAX_DEPTH:
+                        labels.append(_frame_label(frame.f_code))
+                        frame = frame.f_back
+                    labels.reverse()
+                    sample.append(";".join(labels))
+                with self.lock:
+                    self.stacks.update(sample)
+                    self.samples += 1
+                time.sleep(self.interval)
+        finally:
+            # Always release the session, or every later start() gets 409
+            # and node timing stays on.
+            _finish(self)
+
+    def record_node(self, name, wall, cpu):
+        with self.lock:
+            stats = self.nodes.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0})
+            stats["calls"] += 1
+            stats["wall"] += wall
+            stats["cpu"] += cpu
+
+    def result(self, status):
+        with self.lock:
+            stacks = self.stacks.most_common()
+            nodes = {name: dict(s) for name, s in self.nodes.items()}
+            samples = self.samples
+        return {
+            "status": status,
+            "startedAt": self.started,
+            "duration": round(time.time() - self.started, 3),
+            "samples": samples,
+            "intervalMs": self.interval * 1000,
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks),
+            "nodes": {
+                name: {
+                    "calls": s["calls"],
+                    "wallMs": round(s["wall"] * 1000, 2),
+                    "cpuMs": round(s["cpu"] * 1000, 2),
+                    "waitMs": round((s["wall"] - s["cpu"]) * 1000, 2),
+                }
+                for name, s in sorted(nodes.items(), key=lambda kv: -kv[1]["wall"])
+            },
+        }
+
+
+def _finish(session):
+    global _session, _last_result
+    with _lock:
+        if _session is session:
+            _session = None
+            _last_result = session.result("done")
+
+
+def positive_number(value, name):
+    """float(value), or ValueError unless it is finite and greater than zero."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number") from None
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"{name} must be a positive number")
+    return number
+
+
+def start(seconds=None, requests=None, interval=DEFAULT_INTERVAL):
+    """Start profiling for `seconds`, or until `requests` requests finish."""
+    global _session
+    if not seconds and not requests:
+        raise ValueError("seconds or requests is required")
+    seconds = min(positive_number(seconds, "seconds"), MAX_SECONDS) if seconds else MAX_SECONDS
+    if requests:
+        requests = positive_number(requests, "requests")
+        if requests != int(requests):
+            raise ValueError("requests must be a whole number")
+        requests = int(requests)
+    interval = max(positive_number(interval, "interval"), MIN_INTERVAL)
+    with _lock:
+        if _session is not None:
+            raise RuntimeError("a profiling session is already running")
+        _session = _Session(seconds, requests or None, interval)
+        session = _session
+    session.thread.start()
+    return session
+
+
+def wait(session):
+    session.thread.join()
+    return _last_result
+
+
+def request_finished():
+    """Count a finished request towards a request-limited session."""
+    session = _session
+    if session is None or session.remaining is None:
+        return
+    with _lock:
+        session.remaining -= 1
+        if session.remaining <= 0:
+            session.done.set()
+
+
+def status():
+    session = _session
+    if session is not None:
+        return session.result("running")
+    return _last_result
+
+
+def instrument(name, fn):
+    """Wrap a graph node so active sessions get its wall/CPU time."""
+    @functools.wraps(fn)
+    def wrapper(state):
+        session = _session
+        if session is None:
+            return fn(state)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            return fn(state)
+        finally:
+            session.record_node(name, time.perf_counter() - wall, time.thread_time() - cpu)
+    return wrapper
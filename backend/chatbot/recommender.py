@@ -0,0 +1,236 @@
+# recommender.py
+"""
+Local "similar products" index for the no-match fallback.
+
+Each product becomes a row of a dense float32 matrix:
+  - hashed character 3-grams of name (double weight), fabric, colors and
+    description, TF-IDF weighted;
+  - a soft one-hot of its log-price band;
+  - a one-hot of its category.
+Rows are L2-normalized, so ranking the catalog against the unmet filters is
+a single matrix-vector product.
+
+The catalog snapshot comes from the backend's streaming export in a single
+request (revalidated with ETags by backend_client), and only products that
+are new or whose updatedAt changed are re-vectorized; document frequencies are kept as running counts.
+
+A background thread rebuilds the index every RECOMMENDER_TTL_SECONDS (the
+first build starts with the app) and swaps it in whole, so similar() always
+answers from the current index and never waits on the export. Until the
+first build finishes it raises IndexNotReady.
+"""
+import math
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from backend_client import export_catalog
+from logging_config import get_logger
+
+log = get_logger("recommender")
+
+DIM = int(os.getenv("RECOMMENDER_DIM", "512"))
+TTL_SECONDS = float(os.getenv("RECOMMENDER_TTL_SECONDS", "60"))
+
+CATEGORIES = ["women", "men", "kids", "accessories", "fragrances"]
+PRICE_BANDS = 10
+PRICE_WEIGHT = 0.6
+CATEGORY_WEIGHT = 0.4
+
+WIDTH = DIM + PRICE_BANDS + len(CATEGORIES)
+
+
+def _ngrams(text, n=3):
+    for word in re.findall(r"[^\W_]+", (text or "").lower()):
+        padded = f" {word} "
+        for i in range(max(1, len(padded) - n + 1)):
+            yield padded[i:i + n]
+
+
+def _term_counts(parts):
+    """parts: [(text, weight)] -> float32 vector of hashed n-gram counts."""
+    tf = np.zeros(DIM, dtype=np.float32)
+    for text, weight in parts:
+        for gram in _ngrams(text):
+            tf[zlib.crc32(gram.encode("utf-8")) % DIM] += weight
+    return np.log1p(tf)
+
+
+def _price_band(price):
+    # Bands on a log scale: ~Rs 250 ... ~Rs 64k
+    if not price or price <= 0:
+        return None
+    return min(PRICE_BANDS - 1, max(0, int(math.log2(price / 250.0))))
+
+
+def _price_vector(price):
+    v = np.zeros(PRICE_BANDS, dtype=np.float32)
+    band = _price_band(price)
+    if band is not None:
+        v[band] = 1.0
+        if band > 0:
+            v[band - 1] = 0.5
+        if band < PRICE_BANDS - 1:
+            v[band + 1] = 0.5
+    return v
+
+
+def _product_text(p):
+    return [
+        (p.get("name"), 2.0),
+        (p.get("fabric"), 1.0),
+        (" ".join(p.get("colors") or []), 1.0),
+        (p.get("description"), 0.5),
+    ]
+
+
+class IndexNotReady(RuntimeError):
+    """The first catalog build hasn't finished yet."""
+
+
+class _Index:
+    """One immutable build of the catalog matrix."""
+
+    def __init__(self, ids, products, stamps, tf, side, df):
+        self.ids = ids                  # row -> product id
+        self.products = products        # id -> product dict
+        self.stamps = stamps            # id -> updatedAt
+        self.tf = tf
+        self.side = side
+        self.df = df
+        self.categories = np.array([products[pid].get("categorySlug") for pid in ids], dtype=object)
+        n = max(1, len(ids))
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        text = tf * self.idf
+        norms = np.linalg.norm(text, axis=1, keepdims=True)
+        text = np.divide(text, norms, out=np.zeros_like(text), where=norms > 0)
+        matrix = np.concatenate([text, side], axis=1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+EMPTY = _Index([], {}, {}, np.zeros((0, DIM), dtype=np.float32),
+               np.zeros((0, WIDTH - DIM), dtype=np.float32), np.zeros(DIM, dtype=np.float32))
+
+
+def _side_features(p):
+    cat = np.zeros(len(CATEGORIES), dtype=np.float32)
+    if p.get("categorySlug") in CATEGORIES:
+        cat[CATEGORIES.index(p["categorySlug"])] = 1.0
+    return np.concatenate([_price_vector(p.get("price")) * PRICE_WEIGHT, cat * CATEGORY_WEIGHT])
+
+
+class SimilarProducts:
+    def __init__(self):
+        self.lock = threading.Lock()            # guards self.index and self.thread
+        self.refresh_lock = threading.Lock()    # one build at a time
+        self.index = None
+        self.thread = None
+        self.refreshed_at = 0.0
+
+    # ---------------- catalog sync ----------------
+    def start(self):
+        """Start the background refresh thread (idempotent)."""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="recommender", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                log.warning("Recommender refresh failed, keeping the current index: %s", e)
+            time.sleep(TTL_SECONDS)
+
+    def refresh(self):
+        """Fetch the catalog and swap in a rebuilt index. Runs without self.lock."""
+        with self.refresh_lock:
+            old = self.index or EMPTY
+            catalog = {p["id"]: p for p in export_catalog()}
+
+            keep = np.array([pid in catalog and catalog[pid].get("updatedAt") == old.stamps.get(pid)
+                             for pid in old.ids], dtype=bool)
+            df = old.df.copy()
+            dropped = ~keep
+            if dropped.any():
+                df -= (old.tf[dropped] > 0).sum(axis=0)
+            kept_ids = [pid for pid, k in zip(old.ids, keep) if k]
+            kept = set(kept_ids)
+            new_ids = [pid for pid in catalog if pid not in kept]
+
+            new_tf = np.stack([_term_counts(_product_text(catalog[pid])) for pid in new_ids]) \
+                if new_ids else np.zeros((0, DIM), dtype=np.float32)
+            new_side = np.stack([_side_features(catalog[pid]) for pid in new_ids]) \
+                if new_ids else np.zeros((0, WIDTH - DIM), dtype=np.float32)
+            df += (new_tf > 0).sum(axis=0)
+
+            ids = kept_ids + new_ids
+            index = _Index(
+                ids,
+                {pid: catalog[pid] for pid in ids},
+                {pid: catalog[pid].get("updatedAt") for pid in ids},
+                np.concatenate([old.tf[keep], new_tf]),
+                np.concatenate([old.side[keep], new_side]),
+                df,
+            )
+            with self.lock:
+                self.index = index
+                self.refreshed_at = time.time()
+            log.info("Recommender refreshed: %d products (%d re-vectorized)", len(ids), len(new_ids))
+
+    # ---------------- queries ----------------
+    @staticmethod
+    def _query_vector(index, f, category):
+        colors = f.get("colors") or []
+        if isinstance(colors, str):
+            colors = colors.split(",")
+        text = _term_counts([
+            (f.get("q"), 2.0),
+            (f.get("fabric"), 1.0),
+            (" ".join(colors), 1.0),
+        ]) * index.idf
+        norm = np.linalg.norm(text)
+        if norm > 0:
+            text /= norm
+
+        prices = [f.get(k) for k in ("price", "maxPrice", "minPrice")]
+        prices = [float(v) for v in prices if isinstance(v, (int, float)) or (isinstance(v, str) and v.isdigit())]
+        price = sum(prices) / len(prices) if prices else None
+        side = _side_features({"price": price, "categorySlug": category})
+
+        v = np.concatenate([text, side]).astype(np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm > 0 else v
+
+    def similar(self, filters, category=None, k=8):
+        """Products closest to the (unmet) filters, best first."""
+        self.start()
+        with self.lock:
+            index = self.index
+        if index is None:
+            raise IndexNotReady("catalog index is still building")
+        if not index.ids:
+            return []
+        f = {}
+        for item in filters or []:
+            f.update({key: val for key, val in item.items() if val is not None})
+        scores = index.matrix @ self._query_vector(index, f, category)
+        if category:
+            in_category = index.categories == category
+            if in_category.any():
+                scores = np.where(in_category, scores, -np.inf)
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [index.products[index.ids[i]] for i in top]
+
+
+index = SimilarProducts()
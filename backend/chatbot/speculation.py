@@ -0,0 +1,193 @@
+# speculation.py
+"""
+Speculative product prefetch.
+
+chat_node knows from keywords alone that a message is about products, long
+before extract_product_filters gets its answer back from the LLM. We use the
+keyword hits (category and product type) to start a broad /products request
+in the background, then let fetch_products narrow that result locally when
+the real filters arrive. If the LLM filters are not implied by the
+speculative query, fetch_products falls back to a normal backend call.
+"""
+import contextvars
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from backend_client import get_catalog
+
+PREFETCH_LIMIT = 100  # backend max page size
+PREFETCH_WAIT_SECONDS = 5
+MAX_PENDING = 256
+
+CATEGORY_WORDS = {
+    "women": "women", "woman": "women", "ladies": "women", "girls": "women",
+    "men": "men", "man": "men", "gents": "men", "boys": "men",
+    "kids": "kids", "kid": "kids", "children": "kids", "child": "kids",
+    "accessories": "accessories", "accessory": "accessories",
+    "fragrance": "fragrances", "fragrances": "fragrances", "perfume": "fragrances", "perfumes": "fragrances",
+}
+PRODUCT_WORDS = [
+    "shirt", "kurta", "kurti", "dress", "suit", "shalwar",
+    "handbag", "shawl", "dupatta",
+]
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+_pending = {}
+_lock = threading.Lock()
+_stats = {"started": 0, "hits": 0, "misses": 0, "unused": 0}
+
+
+def _tokens(text):
+    return re.findall(r"[^\W_]+", (text or "").lower())
+
+
+def provisional_filters(message):
+    """Backend params guessed from keywords, or None if nothing useful matched."""
+    words = _tokens(message)
+    params = {}
+    for w in words:
+        if w in CATEGORY_WORDS:
+            params["category"] = CATEGORY_WORDS[w]
+            break
+    for w in words:
+        for product in PRODUCT_WORDS:
+            if w.startswith(product):
+                params["q"] = product
+                break
+        if "q" in params:
+            break
+    if not params:
+        return None
+    params["limit"] = PREFETCH_LIMIT
+    return params
+
+
+def start_prefetch(message):
+    """Kick off a background fetch for `message`; returns a speculation id or None."""
+    params = provisional_filters(message)
+    if not params:
+        return None
+    spec_id = uuid.uuid4().hex
+    # copy_context keeps the request's log correlation id in the worker
+    future = _executor.submit(contextvars.copy_context().run, get_catalog, "/products", dict(params))
+    with _lock:
+        # Drop the oldest entries whose graph run never reached fetch_products
+        while len(_pending) >= MAX_PENDING:
+            _pending.pop(next(iter(_pending)))
+            _stats["unused"] += 1
+        _pending[spec_id] = {"params": params, "future": future, "used": False}
+        _stats["started"] += 1
+    return spec_id
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [s.strip() for s in str(value).split(",") if s.strip()]
+
+
+def _as_int(value):
+    if value is None:
+        return None
+    return int(float(value))
+
+
+def _matches_text(product, terms):
+    haystack = _tokens(" ".join(
+        str(product.get(k) or "") for k in ("name", "description", "fabric", "categorySlug")
+    ))
+    return all(any(w.startswith(t) for w in haystack) for t in terms)
+
+
+def _narrow(spec_params, payload, f):
+    """
+    Apply backend filter `f` to the prefetched payload. Returns the items the
+    backend would have returned, or None if the prefetched set can't answer it.
+    """
+    items = payload.get("items", [])
+    if payload.get("total", 0) > len(items):
+        return None  # speculative result was truncated
+    known = {"category", "q", "minPrice", "maxPrice", "colors", "sizes", "sort", "page", "limit"}
+    # Keys the backend ignores (fabric, price, ...) don't change its answer
+    f = {k: v for k, v in f.items() if k in known}
+
+    if spec_params.get("category") and f.get("category") != spec_params["category"]:
+        return None
+    terms = _tokens(f.get("q"))
+    # Prefix search: "kurtas"* only matches products that "kurta"* matched
+    if spec_params.get("q") and not any(t.startswith(spec_params["q"]) for t in terms):
+        return None
+    try:
+        min_price, max_price = _as_int(f.get("minPrice")), _as_int(f.get("maxPrice"))
+        page, limit = _as_int(f.get("page")) or 1, _as_int(f.get("limit")) or 24
+    except (TypeError, ValueError):
+        return None
+    if page != 1:
+        return None
+
+    colors, sizes = _as_list(f.get("colors")), _as_list(f.get("sizes"))
+    out = []
+    for p in items:
+        if f.get("category") and p.get("categorySlug") != f["category"]:
+            continue
+        if min_price is not None and p.get("price", 0) < min_price:
+            continue
+        if max_price is not None and p.get("price", 0) > max_price:
+            continue
+        if colors and not set(colors) & set(p.get("colors", [])):
+            continue
+        if sizes and not set(sizes) & set(p.get("sizes", [])):
+            continue
+        if terms and not _matches_text(p, terms):
+            continue
+        out.append(p)
+
+    sort = f.get("sort")
+    if sort == "price_asc":
+        out.sort(key=lambda p: (p.get("price", 0), p.get("id", 0)))
+    elif sort == "price_desc":
+        out.sort(key=lambda p: (p.get("price", 0), p.get("id", 0)), reverse=True)
+    elif sort == "latest" or not terms:
+        out.sort(key=lambda p: (p.get("createdAt") or "", p.get("id", 0)), reverse=True)
+    # else: relevance — keep the prefetch order (ranked for the speculative q)
+    return out[:limit]
+
+
+def narrow(spec_id, f):
+    """Items for backend filter `f` from speculation `spec_id`, or None to fetch fresh."""
+    if not spec_id:
+        return None
+    with _lock:
+        entry = _pending.get(spec_id)
+    if not entry:
+        return None
+    entry["used"] = True
+    try:
+        payload = entry["future"].result(timeout=PREFETCH_WAIT_SECONDS)
+        items = _narrow(entry["params"], payload, f)
+    except Exception:
+        items = None
+    with _lock:
+        _stats["hits" if items is not None else "misses"] += 1
+    return items
+
+
+def release(spec_id):
+    if not spec_id:
+        return
+    with _lock:
+        entry = _pending.pop(spec_id, None)
+        if entry and not entry["used"]:
+            _stats["unused"] += 1
+
+
+def stats():
+    with _lock:
+        s = dict(_stats)
+    resolved = s["hits"] + s["misses"]
+    s["hit_rate"] = round(s["hits"] / resolved, 3) if resolved else None
+    return s
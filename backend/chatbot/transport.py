@@ -0,0 +1,325 @@
+# transport.py
+"""
+Record / replay / passthrough transport for every outbound call the chatbot
+makes: the Groq LLM (OpenAI SDK over httpx), the Node backend and
+tryon-api.com (requests).
+
+    CHAT_TRANSPORT_MODE=passthrough   # default, real network
+    CHAT_TRANSPORT_MODE=record        # real network, append calls to the cassette
+    CHAT_TRANSPORT_MODE=replay        # never touches the network
+    CHAT_CASSETTE=cassettes/run.jsonl.gz
+    CHAT_REPLAY_LATENCY_SCALE=1.0     # 0 = instant, 1 = original timing
+
+A cassette is JSON Lines (gzipped when the name ends in .gz), one call per
+line: request key, status, a few response headers, body and elapsed time.
+Identical requests are replayed in the order they were recorded. In record
+mode the file is opened once and kept open; each line is sync-flushed so the
+gzip stream shares one compression window across calls and stays readable
+if the process dies.
+Redirects are recorded one hop per line and followed again on replay.
+
+    python transport.py               # self-check: record and replay a
+                                      # redirect against a local server
+"""
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODE = os.getenv("CHAT_TRANSPORT_MODE", "passthrough").lower()
+CASSETTE_PATH = os.getenv("CHAT_CASSETTE", "cassettes/chat.jsonl.gz")
+LATENCY_SCALE = float(os.getenv("CHAT_REPLAY_LATENCY_SCALE", "1.0"))
+# Keep-alive connections per host; sized for parallel batch runs (batch.py)
+POOL_SIZE = int(os.getenv("CHAT_HTTP_POOL_SIZE", "32"))
+
+# Only these response headers are worth keeping; bodies are stored decoded.
+# location lets requests follow recorded redirects hop by hop on replay.
+KEPT_HEADERS = ("content-type", "etag", "cache-control", "x-cache", "location")
+
+
+class CassetteMiss(Exception):
+    """Replay mode got a request that was never recorded."""
+
+
+def _normalize_url(url):
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+def request_key(method, url, body, content_type):
+    """Stable identity of a request: method, normalized URL and body hash."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    body = body or b""
+    # Multipart boundaries are random per request
+    if content_type and "boundary=" in content_type:
+        boundary = content_type.split("boundary=", 1)[1].split(";")[0].strip('"').encode()
+        body = body.replace(boundary, b"BOUNDARY")
+    digest = hashlib.sha1(body).hexdigest()[:16] if body else "-"
+    return f"{method.upper()} {_normalize_url(url)} {digest}"
+
+
+def _encode_body(content, content_type):
+    if content_type and ("json" in content_type or content_type.startswith("text/")):
+        try:
+            return {"b": content.decode("utf-8")}
+        except UnicodeDecodeError:
+            pass
+    return {"b64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(entry):
+    if "b64" in entry:
+        return base64.b64decode(entry["b64"])
+    return entry.get("b", "").encode("utf-8")
+
+
+class Cassette:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.tapes = defaultdict(deque)
+        self.last = {}
+        self.writer = None
+
+    def _open(self, mode):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _read_text(self):
+        if not self.path.endswith(".gz"):
+            with open(self.path, encoding="utf-8") as fh:
+                return fh.read()
+        # zlib rather than gzip.open: a cassette still being recorded (or cut
+        # off by a crash) has no end-of-stream marker yet, but every
+        # sync-flushed line before that point is intact.
+        with open(self.path, "rb") as fh:
+            data = fh.read()
+        chunks = []
+        while data:
+            member = zlib.decompressobj(wbits=31)
+            chunks.append(member.decompress(data))
+            if not member.eof:
+                break
+            data = member.unused_data
+        return b"".join(chunks).decode("utf-8")
+
+    def load(self):
+        # The last piece is empty, or a partially written line; skip it.
+        for line in self._read_text().split("\n")[:-1]:
+            if line.strip():
+                entry = json.loads(line)
+                self.tapes[entry["k"]].append(entry)
+        return self
+
+    def record(self, key, status, headers, content, elapsed):
+        content_type = headers.get("content-type", "")
+        entry = {
+            "k": key,
+            "s": status,
+            "h": {h: headers[h] for h in KEPT_HEADERS if h in headers},
+            "t": round(elapsed, 4),
+            **_encode_body(content, content_type),
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self.lock:
+            if self.writer is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self.writer = self._open("a")
+                atexit.register(self.close)
+            self.writer.write(line + "\n")
+            self.writer.flush()
+        return entry
+
+    def close(self):
+        with self.lock:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+
+    def play(self, key):
+        with self.lock:
+            tape = self.tapes.get(key)
+            if tape:
+                self.last[key] = tape.popleft()
+            entry = self.last.get(key)
+        if entry is None:
+            raise CassetteMiss(key)
+        return entry
+
+
+def _wait(entry):
+    if LATENCY_SCALE > 0:
+        time.sleep(entry["t"] * LATENCY_SCALE)
+
+
+class CassetteAdapter(HTTPAdapter):
+    """requests adapter that records or replays through a Cassette."""
+
+    def __init__(self, cassette, mode):
+        super().__init__(pool_maxsize=POOL_SIZE)
+        self.cassette = cassette
+        self.mode = mode
+
+    def _build(self, request, entry):
+        res = requests.Response()
+        res.status_code = entry["s"]
+        res.headers = CaseInsensitiveDict(entry["h"])
+        res._content = _decode_body(entry)
+        res._content_consumed = True  # body is in memory; lets iter_lines() work
+        res.encoding = get_encoding_from_headers(res.headers)
+        res.url = request.url
+        res.request = request
+        res.reason = "REPLAYED" if self.mode == "replay" else "RECORDED"
+        return res
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url, request.body, request.headers.get("Content-Type"))
+        if self.mode == "replay":
+            entry = self.cassette.play(key)
+            _wait(entry)
+            return self._build(request, entry)
+
+        start = time.perf_counter()
+        res = super().send(request, **kwargs)
+        content = res.content
+        entry = self.cassette.record(key, res.status_code, res.headers, content, time.perf_counter() - start)
+        return self._build(request, entry)
+
+
+class CassetteHttpxTransport(httpx.BaseTransport):
+    """httpx transport (used by the OpenAI SDK) that records or replays."""
+
+    def __init__(self, cassette, mode):
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = httpx.HTTPTransport() if mode == "record" else None
+
+    def _build(self, request, entry):
+        return httpx.Response(entry["s"], headers=entry["h"], content=_decode_body(entry), request=request)
+
+    def handle_request(self, request):
+        body = request.read()
+        key = request_key(request.method, str(request.url), body, request.headers.get("content-type"))
+        if self.mode == "replay":
+            entry = self.cassette.play(key)
+            _wait(entry)
+            return self._build(request, entry)
+
+        start = time.perf_counter()
+        res = self.inner.handle_request(request)
+        try:
+            content = res.read()
+        finally:
+            res.close()
+        # Header lookups below are case-insensitive on httpx.Headers
+        entry = self.cassette.record(key, res.status_code, res.headers, content, time.perf_counter() - start)
+        return self._build(request, entry)
+
+    def close(self):
+        if self.inner:
+            self.inner.close()
+
+
+_cassette = None
+if MODE == "record":
+    _cassette = Cassette(CASSETTE_PATH)
+elif MODE == "replay":
+    _cassette = Cassette(CASSETTE_PATH).load()
+
+
+def http_session():
+    """A requests.Session wired to the configured transport mode."""
+    session = requests.Session()
+    if _cassette is not None:
+        adapter = CassetteAdapter(_cassette, MODE)
+    else:
+        adapter = HTTPAdapter(pool_maxsize=POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def httpx_client():
+    """httpx.Client for the OpenAI SDK, or None to let the SDK use its default."""
+    if _cassette is None:
+        return None
+    return httpx.Client(transport=CassetteHttpxTransport(_cassette, MODE))
+
+
+def sleep(seconds):
+    """time.sleep that honours the replay latency scale (try-on polling)."""
+    if MODE == "replay":
+        seconds *= LATENCY_SCALE
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _self_check():
+    """Record a redirected request against a local server, then replay it."""
+    import http.server
+    import tempfile
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/old"):
+                self.send_response(302)
+                self.send_header("Location", "/new?v=2")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/old?v=1"
+
+    def fetch(cassette, mode):
+        session = requests.Session()
+        session.mount("http://", CassetteAdapter(cassette, mode))
+        res = session.get(url, timeout=5)
+        res.raise_for_status()
+        return res
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "check.jsonl.gz")
+        cassette = Cassette(path)
+        recorded = fetch(cassette, "record")
+        cassette.close()
+        server.shutdown()
+        replayed = fetch(Cassette(path).load(), "replay")
+
+    for label, res in (("record", recorded), ("replay", replayed)):
+        assert res.status_code == 200 and res.json() == {"ok": True}, (label, res.status_code, res.content)
+        assert [r.status_code for r in res.history] == [302], (label, res.history)
+        assert res.url.endswith("/new?v=2"), (label, res.url)
+    print("transport self-check passed: redirect recorded and replayed")
+
+
+if __name__ == "__main__":
+    _self_check()
@@ -0,0 +1,237 @@
+# wire.py
+"""
+Response encoding for the chatbot API.
+
+- JSON is serialized with orjson when it is installed (stdlib json
+  otherwise); init_app() also installs it as Flask's JSON provider, so
+  jsonify() benefits too.
+- Clients that send `Accept: application/vnd.zaraara.columnar+json` get the
+  columnar layout: every list of two or more dicts sharing the same keys
+  (product cards, orders, order items) becomes
+  {"$cols": [...], "$rows": [[...], ...], "$const": {...}}, where $const
+  holds columns whose value is identical in every row. Only an explicit
+  Accept entry selects it; */* keeps plain JSON.
+- Responses of at least CHAT_COMPRESS_MIN_BYTES are compressed with brotli
+  (if the brotli package is installed) or gzip, per Accept-Encoding.
+  Streamed responses (e.g. /api/chat/batch) are left alone.
+- Body and on-the-wire sizes and encode/compress time are recorded per
+  response type; see stats(), served by /api/chat/stats. For columnar
+  responses the plain-JSON size is only measured on a sample
+  (CHAT_WIRE_RAW_SAMPLE_RATE) so the hot path encodes once.
+"""
+import gzip
+import json
+import os
+import random
+import threading
+import time
+
+from flask import Response, g, request
+from flask.json.provider import DefaultJSONProvider
+
+from logging_config import get_logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip is always available
+    brotli = None
+
+log = get_logger("wire")
+
+COLUMNAR_MIMETYPE = "application/vnd.zaraara.columnar+json"
+COMPRESS_MIN_BYTES = int(os.getenv("CHAT_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("CHAT_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("CHAT_BROTLI_QUALITY", "5"))
+RAW_SAMPLE_RATE = float(os.getenv("CHAT_WIRE_RAW_SAMPLE_RATE", "0.05"))
+
+_COMPRESSIBLE = ("text/", "application/json", "application/x-ndjson", "+json")
+
+
+# ------------------- JSON -------------------
+def dumps(obj, default=None):
+    """Serialize to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson rejects a few things stdlib json accepts (e.g. ints
+            # wider than 64 bits); fall through rather than fail the request.
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps()."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get("indent") or kwargs.get("cls"):
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=kwargs.get("default", self.default)).decode("utf-8")
+
+
+# ------------------- Columnar layout -------------------
+def columnar(value):
+    """Rewrite lists of same-shaped dicts into the $cols/$rows layout."""
+    if isinstance(value, dict):
+        return {k: columnar(v) for k, v in value.items()}
+    if not isinstance(value, list):
+        return value
+    items = [columnar(v) for v in value]
+    if len(items) < 2 or not all(isinstance(v, dict) for v in items):
+        return items
+    keys = list(items[0])
+    if any(list(v) != keys for v in items[1:]):
+        return items
+    const = {k: items[0][k] for k in keys if all(v[k] == items[0][k] for v in items[1:])}
+    cols = [k for k in keys if k not in const]
+    table = {"$cols": cols, "$rows": [[v[k] for k in cols] for v in items]}
+    if const:
+        table["$const"] = const
+    return table
+
+
+def _accepts_exact(mimetype):
+    return any(value == mimetype and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+# ------------------- Metrics -------------------
+_lock = threading.Lock()
+_metrics = {}
+
+
+def _record(kind, raw_bytes, body_bytes, wire_bytes, encode_ms, compress_ms, fmt, encoding):
+    """raw_bytes is the plain-JSON size, or None when it wasn't measured."""
+    with _lock:
+        m = _metrics.get(kind)
+        if m is None:
+            m = _metrics[kind] = {
+                "count": 0, "rawSamples": 0, "rawBytes": 0, "rawWireBytes": 0,
+                "bodyBytes": 0, "wireBytes": 0,
+                "encodeMs": 0.0, "compressMs": 0.0, "maxEncodeMs": 0.0,
+                "formats": {}, "encodings": {},
+            }
+        m["count"] += 1
+        if raw_bytes is not None:
+            m["rawSamples"] += 1
+            m["rawBytes"] += raw_bytes
+            m["rawWireBytes"] += wire_bytes
+        m["bodyBytes"] += body_bytes
+        m["wireBytes"] += wire_bytes
+        m["encodeMs"] += encode_ms
+        m["compressMs"] += compress_ms
+        m["maxEncodeMs"] = max(m["maxEncodeMs"], encode_ms)
+        m["formats"][fmt] = m["formats"].get(fmt, 0) + 1
+        m["encodings"][encoding] = m["encodings"].get(encoding, 0) + 1
+
+
+def stats():
+    """Per response type averages since startup."""
+    out = {}
+    with _lock:
+        for kind, m in _metrics.items():
+            n = m["count"]
+            out[kind] = {
+                "count": n,
+                "avgRawBytes": round(m["rawBytes"] / m["rawSamples"]) if m["rawSamples"] else None,
+                "avgBodyBytes": round(m["bodyBytes"] / n),
+                "avgWireBytes": round(m["wireBytes"] / n),
+                # Over the responses whose plain size was measured
+                "wireRatio": round(m["rawWireBytes"] / m["rawBytes"], 3) if m["rawBytes"] else None,
+                "avgEncodeMs": round(m["encodeMs"] / n, 3),
+                "maxEncodeMs": round(m["maxEncodeMs"], 3),
+                "avgCompressMs": round(m["compressMs"] / n, 3),
+                "formats": dict(m["formats"]),
+                "encodings": dict(m["encodings"]),
+            }
+    return {"json": "orjson" if orjson is not None else "stdlib",
+            "compression": ["br", "gzip"] if brotli is not None else ["gzip"],
+            "minBytes": COMPRESS_MIN_BYTES,
+            "types": out}
+
+
+def response_type(responses):
+    """Metrics key for a list of chat responses, e.g. "products+text"."""
+    types = sorted({r.get("type", "unknown") for r in responses if isinstance(r, dict)})
+    return "+".join(types) or "empty"
+
+
+# ------------------- Responses -------------------
+def respond(payload, kind, status=200):
+    """
+    JSON response for `payload`, in the columnar layout when the client asked
+    for it. `kind` names the response type in stats().
+    """
+    fmt = "columnar" if _accepts_exact(COLUMNAR_MIMETYPE) else "json"
+    start = time.perf_counter()
+    body = dumps(columnar(payload) if fmt == "columnar" else payload)
+    encode_ms = (time.perf_counter() - start) * 1000
+    if fmt == "json":
+        raw_bytes = len(body)
+    elif random.random() < RAW_SAMPLE_RATE:
+        raw_bytes = len(dumps(payload))
+    else:
+        raw_bytes = None
+
+    resp = Response(body, status=status,
+                    mimetype=COLUMNAR_MIMETYPE if fmt == "columnar" else "application/json")
+    resp.vary.add("Accept")
+    g.wire = {"kind": kind, "raw": raw_bytes, "body": len(body), "encode_ms": encode_ms, "format": fmt}
+    return resp
+
+
+def _pick_encoding():
+    offered = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0
+    for name in offered:
+        q = request.accept_encodings[name]
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _compressible(resp):
+    mimetype = resp.mimetype or ""
+    return any(mimetype.startswith(t) or mimetype.endswith(t) for t in _COMPRESSIBLE)
+
+
+def _compress(resp):
+    encoding = "identity"
+    compress_ms = 0.0
+    eligible = (
+        not resp.direct_passthrough
+        and not resp.is_streamed
+        and resp.status_code not in (204, 304)
+        and "Content-Encoding" not in resp.headers
+        and _compressible(resp)
+    )
+    if eligible:
+        resp.vary.add("Accept-Encoding")
+        data = resp.get_data()
+        chosen = _pick_encoding() if len(data) >= COMPRESS_MIN_BYTES else None
+        if chosen:
+            start = time.perf_counter()
+            if chosen == "br":
+                packed = brotli.compress(data, quality=BROTLI_QUALITY)
+            else:
+                packed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+            compress_ms = (time.perf_counter() - start) * 1000
+            resp.set_data(packed)
+            resp.headers["Content-Encoding"] = chosen
+            encoding = chosen
+
+    info = g.pop("wire", None)
+    if info is not None:
+        _record(info["kind"], info["raw"], info["body"], resp.content_length or info["body"],
+                info["encode_ms"], compress_ms, info["format"], encoding)
+    return resp
+
+
+def init_app(app):
+    app.json = JSONProvider(app)
+    app.after_request(_compress)
@@ -0,0 +1,102 @@
+import 'dotenv/config';
+import { prisma } from '../src/prisma.js';
+import { dayKey } from '../src/utils/analyticsRollup.js';
+
+// Rebuilds the Daily*Stat and CustomerFirstOrder rollup tables from the orders table.
+// Run once after deploying the rollups, or whenever they need repairing:
+//   npm --prefix backend run analytics:backfill
+// Orders written while this runs may be missed; run it during a quiet period.
+
+const BATCH_SIZE = 500;
+const WRITE_CHUNK = 500;
+
+function add(map, key, fields, values) {
+  const entry = map.get(key) ?? { ...fields };
+  for (const [k, v] of Object.entries(values)) entry[k] += v;
+  map.set(key, entry);
+}
+
+async function collect() {
+  const orderStats = new Map();
+  const categoryStats = new Map();
+  const productStats = new Map();
+  const customerStats = new Map();
+  const firstOrders = new Map();
+
+  let cursor;
+  let scanned = 0;
+  for (;;) {
+    // eslint-disable-next-line no-await-in-loop
+    const batch = await prisma.order.findMany({
+      take: BATCH_SIZE,
+      ...(cursor ? { skip: 1, cursor: { id: cursor } } : {}),
+      orderBy: { id: 'asc' },
+      select: {
+        id: true,
+        status: true,
+        total: true,
+        customerEmail: true,
+        createdAt: true,
+        items: {
+          select: { productId: true, quantity: true, lineTotal: true, product: { select: { categorySlug: true } } },
+        },
+      },
+    });
+    if (!batch.length) break;
+
+    for (const order of batch) {
+      const day = dayKey(order.createdAt);
+      add(orderStats, `${day}|${order.status}`, { day, status: order.status, orders: 0, revenue: 0 }, { orders: 1, revenue: order.total });
+      add(customerStats, `${day}|${order.customerEmail}`, { day, customerEmail: order.customerEmail, orders: 0 }, { orders: 1 });
+      const first = firstOrders.get(order.customerEmail);
+      if (!first || day < first.day) firstOrders.set(order.customerEmail, { customerEmail: order.customerEmail, day });
+      for (const item of order.items) {
+        const categorySlug = item.product.categorySlug;
+        add(categoryStats, `${day}|${categorySlug}`, { day, categorySlug, units: 0, revenue: 0 }, { units: item.quantity, revenue: item.lineTotal });
+        add(productStats, `${day}|${item.productId}`, { day, productId: item.productId, units: 0, revenue: 0 }, { units: item.quantity, revenue: item.lineTotal });
+      }
+    }
+
+    scanned += batch.length;
+    cursor = batch[batch.length - 1].id;
+  }
+
+  return { scanned, orderStats, categoryStats, productStats, customerStats, firstOrders };
+}
+
+function chunks(rows) {
+  const out = [];
+  for (let i = 0; i < rows.length; i += WRITE_CHUNK) out.push(rows.slice(i, i + WRITE_CHUNK));
+  return out;
+}
+
+async function main() {
+  const { scanned, orderStats, categoryStats, productStats, customerStats, firstOrders } = await collect();
+
+  await prisma.$transaction([
+    prisma.dailyOrderStat.deleteMany({}),
+    prisma.dailyCategoryStat.deleteMany({}),
+    prisma.dailyProductStat.deleteMany({}),
+    prisma.dailyCustomerStat.deleteMany({}),
+    prisma.customerFirstOrder.deleteMany({}),
+    ...chunks([...orderStats.values()]).map((data) => prisma.dailyOrderStat.createMany({ data })),
+    ...chunks([...categoryStats.values()]).map((data) => prisma.dailyCategoryStat.createMany({ data })),
+    ...chunks([...productStats.values()]).map((data) => prisma.dailyProductStat.createMany({ data })),
+    ...chunks([...customerStats.values()]).map((data) => prisma.dailyCustomerStat.createMany({ data })),
+    ...chunks([...firstOrders.values()]).map((data) => prisma.customerFirstOrder.createMany({ data })),
+  ]);
+
+  // eslint-disable-next-line no-console
+  console.log(`Backfilled analytics from ${scanned} orders (${orderStats.size} day/status rows)`);
+}
+
+main()
+  .then(async () => {
+    await prisma.$disconnect();
+  })
+  .catch(async (e) => {
+    // eslint-disable-next-line no-console
+    console.error(e);
+    await prisma.$disconnect();
+    process.exit(1);
+  });
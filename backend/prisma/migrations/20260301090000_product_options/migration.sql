@@ -0,0 +1,43 @@
+-- CreateTable
+CREATE TABLE "ProductColor" (
+    "productId" INTEGER NOT NULL,
+    "value" TEXT NOT NULL,
+
+    PRIMARY KEY ("productId", "value"),
+    CONSTRAINT "ProductColor_productId_fkey" FOREIGN KEY ("productId") REFERENCES "Product" ("id") ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- CreateTable
+CREATE TABLE "ProductSize" (
+    "productId" INTEGER NOT NULL,
+    "value" TEXT NOT NULL,
+
+    PRIMARY KEY ("productId", "value"),
+    CONSTRAINT "ProductSize_productId_fkey" FOREIGN KEY ("productId") REFERENCES "Product" ("id") ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- CreateIndex
+CREATE INDEX "ProductColor_value_productId_idx" ON "ProductColor"("value", "productId");
+
+-- CreateIndex
+CREATE INDEX "ProductSize_value_productId_idx" ON "ProductSize"("value", "productId");
+
+-- CreateIndex
+CREATE INDEX "Product_categorySlug_price_idx" ON "Product"("categorySlug", "price");
+
+-- CreateIndex
+CREATE INDEX "Product_price_idx" ON "Product"("price");
+
+-- CreateIndex
+CREATE INDEX "Product_createdAt_idx" ON "Product"("createdAt");
+
+-- Backfill option rows from the existing JSON columns
+INSERT OR IGNORE INTO "ProductColor" ("productId", "value")
+SELECT "Product"."id", j."value"
+FROM "Product", json_each("Product"."colorsJson") AS j
+WHERE json_valid("Product"."colorsJson") AND j."type" = 'text';
+
+INSERT OR IGNORE INTO "ProductSize" ("productId", "value")
+SELECT "Product"."id", j."value"
+FROM "Product", json_each("Product"."sizesJson") AS j
+WHERE json_valid("Product"."sizesJson") AND j."type" = 'text';
@@ -0,0 +1,36 @@
+-- Full-text index over the searchable product columns. External-content
+-- FTS5 table: it stores only the index and reads column values from
+-- "Product", so the triggers below keep it in sync on every write path.
+CREATE VIRTUAL TABLE "ProductSearch" USING fts5(
+    "name",
+    "description",
+    "fabric",
+    "categorySlug",
+    content='Product',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+-- Rank with BM25, weighting name > fabric > category > description
+INSERT INTO "ProductSearch" ("ProductSearch", "rank") VALUES ('rank', 'bm25(10.0, 2.0, 4.0, 3.0)');
+
+CREATE TRIGGER "Product_search_ai" AFTER INSERT ON "Product" BEGIN
+    INSERT INTO "ProductSearch" ("rowid", "name", "description", "fabric", "categorySlug")
+    VALUES (new."id", new."name", new."description", new."fabric", new."categorySlug");
+END;
+
+CREATE TRIGGER "Product_search_ad" AFTER DELETE ON "Product" BEGIN
+    INSERT INTO "ProductSearch" ("ProductSearch", "rowid", "name", "description", "fabric", "categorySlug")
+    VALUES ('delete', old."id", old."name", old."description", old."fabric", old."categorySlug");
+END;
+
+CREATE TRIGGER "Product_search_au" AFTER UPDATE OF "name", "description", "fabric", "categorySlug" ON "Product" BEGIN
+    INSERT INTO "ProductSearch" ("ProductSearch", "rowid", "name", "description", "fabric", "categorySlug")
+    VALUES ('delete', old."id", old."name", old."description", old."fabric", old."categorySlug");
+    INSERT INTO "ProductSearch" ("rowid", "name", "description", "fabric", "categorySlug")
+    VALUES (new."id", new."name", new."description", new."fabric", new."categorySlug");
+END;
+
+-- Index rows that already exist
+INSERT INTO "ProductSearch" ("ProductSearch") VALUES ('rebuild');
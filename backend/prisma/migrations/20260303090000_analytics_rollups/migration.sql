@@ -0,0 +1,44 @@
+-- CreateTable
+CREATE TABLE "DailyOrderStat" (
+    "day" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "orders" INTEGER NOT NULL DEFAULT 0,
+    "revenue" INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY ("day", "status")
+);
+
+-- CreateTable
+CREATE TABLE "DailyCategoryStat" (
+    "day" TEXT NOT NULL,
+    "categorySlug" TEXT NOT NULL,
+    "units" INTEGER NOT NULL DEFAULT 0,
+    "revenue" INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY ("day", "categorySlug")
+);
+
+-- CreateTable
+CREATE TABLE "DailyProductStat" (
+    "day" TEXT NOT NULL,
+    "productId" INTEGER NOT NULL,
+    "units" INTEGER NOT NULL DEFAULT 0,
+    "revenue" INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY ("day", "productId")
+);
+
+-- CreateTable
+CREATE TABLE "DailyCustomerStat" (
+    "day" TEXT NOT NULL,
+    "customerEmail" TEXT NOT NULL,
+    "orders" INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY ("day", "customerEmail")
+);
+
+-- CreateIndex
+CREATE INDEX "DailyProductStat_productId_idx" ON "DailyProductStat"("productId");
+
+-- CreateIndex
+CREATE INDEX "DailyCustomerStat_customerEmail_idx" ON "DailyCustomerStat"("customerEmail");
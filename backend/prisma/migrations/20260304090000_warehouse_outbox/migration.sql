@@ -0,0 +1,20 @@
+-- CreateTable
+CREATE TABLE "WarehouseOutbox" (
+    "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "orderNumber" TEXT NOT NULL,
+    "kind" TEXT NOT NULL,
+    "payloadJson" TEXT NOT NULL,
+    "status" TEXT NOT NULL DEFAULT 'PENDING',
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "nextAttemptAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "lastError" TEXT,
+    "resultJson" TEXT,
+    "createdAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "sentAt" DATETIME
+);
+
+-- CreateIndex
+CREATE INDEX "WarehouseOutbox_status_nextAttemptAt_idx" ON "WarehouseOutbox"("status", "nextAttemptAt");
+
+-- CreateIndex
+CREATE INDEX "WarehouseOutbox_orderNumber_kind_status_idx" ON "WarehouseOutbox"("orderNumber", "kind", "status");
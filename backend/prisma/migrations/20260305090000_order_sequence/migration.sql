@@ -0,0 +1,8 @@
+-- CreateTable
+CREATE TABLE "Sequence" (
+    "name" TEXT NOT NULL PRIMARY KEY,
+    "next" INTEGER NOT NULL DEFAULT 0
+);
+
+-- Seed the order number sequence
+INSERT INTO "Sequence" ("name", "next") VALUES ('order', 0);
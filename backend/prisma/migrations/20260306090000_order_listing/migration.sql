@@ -0,0 +1,39 @@
+-- CreateIndex
+CREATE INDEX "Order_createdAt_id_idx" ON "Order"("createdAt", "id");
+
+-- CreateIndex
+CREATE INDEX "Order_status_createdAt_id_idx" ON "Order"("status", "createdAt", "id");
+
+-- Full-text index for the support order search. "Order" has a text primary
+-- key, so this is a regular (contentful) FTS5 table carrying the order id.
+-- The order number is indexed both whole and without its "JJ" prefix so a
+-- bare digit prefix finds it too.
+CREATE VIRTUAL TABLE "OrderSearch" USING fts5(
+    "orderId" UNINDEXED,
+    "orderNumber",
+    "customerName",
+    "customerEmail",
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER "Order_search_ai" AFTER INSERT ON "Order" BEGIN
+    INSERT INTO "OrderSearch" ("orderId", "orderNumber", "customerName", "customerEmail")
+    VALUES (new."id", new."orderNumber" || ' ' || substr(new."orderNumber", 3), new."customerName", new."customerEmail");
+END;
+
+-- Orders are not deleted or renamed in normal operation, so the scan these
+-- two triggers do over the UNINDEXED id column is acceptable.
+CREATE TRIGGER "Order_search_ad" AFTER DELETE ON "Order" BEGIN
+    DELETE FROM "OrderSearch" WHERE "orderId" = old."id";
+END;
+
+CREATE TRIGGER "Order_search_au" AFTER UPDATE OF "orderNumber", "customerName", "customerEmail" ON "Order" BEGIN
+    DELETE FROM "OrderSearch" WHERE "orderId" = old."id";
+    INSERT INTO "OrderSearch" ("orderId", "orderNumber", "customerName", "customerEmail")
+    VALUES (new."id", new."orderNumber" || ' ' || substr(new."orderNumber", 3), new."customerName", new."customerEmail");
+END;
+
+-- Index orders that already exist
+INSERT INTO "OrderSearch" ("orderId", "orderNumber", "customerName", "customerEmail")
+SELECT "id", "orderNumber" || ' ' || substr("orderNumber", 3), "customerName", "customerEmail" FROM "Order";
@@ -0,0 +1,12 @@
+-- CreateTable
+CREATE TABLE "RateLimitHit" (
+    "key" TEXT NOT NULL,
+    "bucket" BIGINT NOT NULL,
+    "count" INTEGER NOT NULL,
+    "expiresAt" BIGINT NOT NULL,
+
+    PRIMARY KEY ("key", "bucket")
+);
+
+-- CreateIndex
+CREATE INDEX "RateLimitHit_expiresAt_idx" ON "RateLimitHit"("expiresAt");
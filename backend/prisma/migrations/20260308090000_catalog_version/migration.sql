@@ -0,0 +1,69 @@
+-- Catalog version: one row, bumped by the triggers below on every write to
+-- the catalog tables, whichever process or tool makes it. API processes
+-- compare it to decide whether cached catalog responses and ETags are stale.
+CREATE TABLE "CatalogVersion" (
+    "id" INTEGER NOT NULL PRIMARY KEY,
+    "version" INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO "CatalogVersion" ("id", "version") VALUES (1, 1);
+
+CREATE TRIGGER "Country_catalog_version_ai" AFTER INSERT ON "Country" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "Country_catalog_version_au" AFTER UPDATE ON "Country" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "Country_catalog_version_ad" AFTER DELETE ON "Country" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "Category_catalog_version_ai" AFTER INSERT ON "Category" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "Category_catalog_version_au" AFTER UPDATE ON "Category" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "Category_catalog_version_ad" AFTER DELETE ON "Category" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "Product_catalog_version_ai" AFTER INSERT ON "Product" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "Product_catalog_version_au" AFTER UPDATE ON "Product" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "Product_catalog_version_ad" AFTER DELETE ON "Product" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "ProductColor_catalog_version_ai" AFTER INSERT ON "ProductColor" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "ProductColor_catalog_version_au" AFTER UPDATE ON "ProductColor" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "ProductColor_catalog_version_ad" AFTER DELETE ON "ProductColor" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "ProductSize_catalog_version_ai" AFTER INSERT ON "ProductSize" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "ProductSize_catalog_version_au" AFTER UPDATE ON "ProductSize" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
+
+CREATE TRIGGER "ProductSize_catalog_version_ad" AFTER DELETE ON "ProductSize" BEGIN
+    UPDATE "CatalogVersion" SET "version" = "version" + 1 WHERE "id" = 1;
+END;
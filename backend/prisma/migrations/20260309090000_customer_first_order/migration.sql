@@ -0,0 +1,12 @@
+-- CreateTable
+CREATE TABLE "CustomerFirstOrder" (
+    "customerEmail" TEXT NOT NULL PRIMARY KEY,
+    "day" TEXT NOT NULL
+);
+
+-- CreateIndex
+CREATE INDEX "CustomerFirstOrder_day_idx" ON "CustomerFirstOrder"("day");
+
+-- Seed from the existing daily customer rollup
+INSERT INTO "CustomerFirstOrder" ("customerEmail", "day")
+SELECT "customerEmail", MIN("day") FROM "DailyCustomerStat" GROUP BY "customerEmail";
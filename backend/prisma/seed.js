@@ -38,6 +38,8 @@ async function seedCountriesAndCategories() {
     const images = p.images ?? [p.image];
     const colors = p.colors ?? [];
     const sizes = p.sizes ?? [];
+    const colorRows = [...new Set(colors)].map((value) => ({ value }));
+    const sizeRows = [...new Set(sizes)].map((value) => ({ value }));
     // eslint-disable-next-line no-await-in-loop
     await prisma.product.upsert({
       where: { id: p.id },
@@ -54,6 +56,8 @@ async function seedCountriesAndCategories() {
         sizesJson: JSON.stringify(sizes),
         fabric: p.fabric ?? null,
         description: p.description ?? null,
+        colorOptions: { deleteMany: {}, create: colorRows },
+        sizeOptions: { deleteMany: {}, create: sizeRows },
       },
       create: {
         id: p.id,
@@ -69,6 +73,8 @@ async function seedCountriesAndCategories() {
         sizesJson: JSON.stringify(sizes),
         fabric: p.fabric ?? null,
         description: p.description ?? null,
+        colorOptions: { create: colorRows },
+        sizeOptions: { create: sizeRows },
       },
     });
   }
@@ -0,0 +1,120 @@
+// Checkout load test: POSTs orders against a running API and reports
+// sustained orders/second and latency percentiles.
+//
+//   node scripts/benchmarkCheckout.js --duration 30 --concurrency 32
+//
+// Options (also settable via env): --url (BENCH_API_URL, default
+// http://localhost:4000/api), --duration seconds (default 20), --concurrency
+// in-flight requests (default 16), --items per order (default 2).
+//
+// Every successful request creates a real order, so point it at a dev database.
+import 'dotenv/config';
+
+function parseArgs(argv) {
+  const args = {};
+  for (let i = 0; i < argv.length; i += 1) {
+    if (argv[i].startsWith('--')) args[argv[i].slice(2)] = argv[i + 1];
+  }
+  return args;
+}
+
+const args = parseArgs(process.argv.slice(2));
+const apiUrl = (args.url ?? process.env.BENCH_API_URL ?? `http://localhost:${process.env.PORT ?? 4000}/api`).replace(/\/$/, '');
+const durationMs = Number(args.duration ?? 20) * 1000;
+const concurrency = Number(args.concurrency ?? 16);
+const itemsPerOrder = Number(args.items ?? 2);
+
+function percentile(sorted, q) {
+  if (!sorted.length) return null;
+  return sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))];
+}
+
+function orderBody(productIds, n) {
+  const items = Array.from({ length: itemsPerOrder }, () => ({
+    productId: productIds[Math.floor(Math.random() * productIds.length)],
+    quantity: 1 + Math.floor(Math.random() * 3),
+  }));
+  return {
+    customer: { name: `Bench Customer ${n}`, email: `bench+${n % 500}@techfy.local` },
+    shippingAddress: { line1: '1 Bench Street', city: 'Lahore', postalCode: '54000', countryCode: 'PK' },
+    items,
+  };
+}
+
+async function main() {
+  const res = await fetch(`${apiUrl}/products?limit=100`);
+  if (!res.ok) throw new Error(`Could not load products: ${res.status}`);
+  const productIds = (await res.json()).items.map((p) => p.id);
+  if (!productIds.length) throw new Error('No products to order; run the seed first');
+
+  const latencies = [];
+  const errors = new Map();
+  const orderNumbers = new Set();
+  let duplicates = 0;
+  let sent = 0;
+
+  const started = performance.now();
+  const deadline = started + durationMs;
+
+  async function worker() {
+    while (performance.now() < deadline) {
+      sent += 1;
+      const t0 = performance.now();
+      try {
+        // eslint-disable-next-line no-await-in-loop
+        const r = await fetch(`${apiUrl}/orders`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify(orderBody(productIds, sent)),
+        });
+        // eslint-disable-next-line no-await-in-loop
+        const payload = await r.json();
+        if (r.status !== 201) {
+          const key = `${r.status} ${payload?.error?.message ?? ''}`.trim();
+          errors.set(key, (errors.get(key) ?? 0) + 1);
+          continue;
+        }
+        latencies.push(performance.now() - t0);
+        if (orderNumbers.has(payload.order.orderNumber)) duplicates += 1;
+        orderNumbers.add(payload.order.orderNumber);
+      } catch (e) {
+        errors.set(e.message, (errors.get(e.message) ?? 0) + 1);
+      }
+    }
+  }
+
+  await Promise.all(Array.from({ length: concurrency }, worker));
+  const elapsed = (performance.now() - started) / 1000;
+
+  latencies.sort((a, b) => a - b);
+  const round = (v) => (v == null ? null : Math.round(v * 10) / 10);
+  // eslint-disable-next-line no-console
+  console.log(
+    JSON.stringify(
+      {
+        apiUrl,
+        concurrency,
+        itemsPerOrder,
+        seconds: round(elapsed),
+        orders: latencies.length,
+        ordersPerSecond: round(latencies.length / elapsed),
+        latencyMs: {
+          p50: round(percentile(latencies, 0.5)),
+          p95: round(percentile(latencies, 0.95)),
+          p99: round(percentile(latencies, 0.99)),
+          max: round(latencies[latencies.length - 1]),
+        },
+        duplicateOrderNumbers: duplicates,
+        errors: Object.fromEntries(errors),
+      },
+      null,
+      2
+    )
+  );
+}
+
+main().catch((e) => {
+  // eslint-disable-next-line no-console
+  console.error(e);
+  process.exit(1);
+});
@@ -14,3 +14,23 @@ export async function pushStatus(orderNumber, status) {
   await new Promise((r) => setTimeout(r, 25));
   return { success: true, orderNumber, status };
 }
+
+// Delivers several queued calls at once; used by the outbox dispatcher.
+// messages: [{ id, kind: 'LABEL' | 'STATUS', orderNumber, payload }]
+// Resolves to one { id, success, result?, error? } per message. A real WMS
+// would take these in a single bulk request; the stub fans out locally.
+export async function sendBatch(messages) {
+  return Promise.all(
+    messages.map(async ({ id, kind, orderNumber, payload }) => {
+      try {
+        const result =
+          kind === 'LABEL'
+            ? await updateShippingLabel(orderNumber, payload.shippingAddress)
+            : await pushStatus(orderNumber, payload.status);
+        return { id, success: result?.success !== false, result };
+      } catch (e) {
+        return { id, success: false, error: e.message };
+      }
+    })
+  );
+}
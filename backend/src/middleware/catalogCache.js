@@ -0,0 +1,37 @@
+import { asyncHandler } from './asyncHandler.js';
+import {
+  catalogEtag,
+  getCatalogVersion,
+  normalizedRequestKey,
+  responseCache,
+} from '../utils/catalogCache.js';
+
+// Conditional GET + server-side response cache for read-only catalog routes.
+// A matching If-None-Match gets a 304 and a cached body is replayed as-is;
+// neither touches the database beyond the (briefly cached) catalog version.
+export const catalogCache = asyncHandler(async (req, res, next) => {
+  if (req.method !== 'GET') return next();
+
+  const key = normalizedRequestKey(req);
+  const version = await getCatalogVersion();
+  res.set('ETag', catalogEtag(key, version));
+  res.set('Cache-Control', 'no-cache');
+
+  if (req.fresh) return res.status(304).end();
+
+  const hit = responseCache.get(key);
+  if (hit && hit.version === version) {
+    res.set('X-Cache', 'HIT');
+    return res.type('json').send(hit.body);
+  }
+
+  const json = res.json.bind(res);
+  res.json = (payload) => {
+    if (res.statusCode !== 200) return json(payload);
+    const body = JSON.stringify(payload);
+    responseCache.set(key, { version, body });
+    res.set('X-Cache', 'MISS');
+    return res.type('json').send(body);
+  };
+  return next();
+});
@@ -1,4 +1,10 @@
 import rateLimit from 'express-rate-limit';
+import { SharedWindowStore } from '../utils/rateLimitStore.js';
+
+// Budgets are shared by every API process through the database
+// (see utils/rateLimitStore.js). RATE_LIMIT_STORE=memory falls back to
+// express-rate-limit's per-process memory store.
+const useSharedStore = (process.env.RATE_LIMIT_STORE ?? 'shared') !== 'memory';
 
 // Generic API limiter
 export const apiRateLimiter = rateLimit({
@@ -7,6 +13,7 @@ export const apiRateLimiter = rateLimit({
   standardHeaders: true,
   legacyHeaders: false,
   keyGenerator: (req) => req.ip,
+  ...(useSharedStore ? { store: new SharedWindowStore({ prefix: 'api:' }) } : {}),
 });
 
 // Tighter limiter for support endpoints
@@ -16,4 +23,5 @@ export const supportRateLimiter = rateLimit({
   standardHeaders: true,
   legacyHeaders: false,
   keyGenerator: (req) => req.ip,
+  ...(useSharedStore ? { store: new SharedWindowStore({ prefix: 'support:' }) } : {}),
 });
@@ -7,3 +7,14 @@ export const prisma = globalForPrisma.__prismaClient ?? new PrismaClient();
 if (process.env.NODE_ENV !== 'production') {
   globalForPrisma.__prismaClient = prisma;
 }
+
+// SQLite tuning, run once at startup. WAL lets readers (catalog, support
+// lists) keep going while checkouts write, and commits only append to the
+// log. journal_mode is persisted in the database file. The per-connection
+// busy timeout comes from the connection URL instead
+// (DATABASE_URL="file:./dev.db?socket_timeout=10"), so it applies to every
+// pooled connection.
+export async function configureDatabase() {
+  if (!process.env.DATABASE_URL?.startsWith('file:')) return;
+  await prisma.$queryRawUnsafe('PRAGMA journal_mode = WAL;');
+}
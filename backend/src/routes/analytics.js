@@ -0,0 +1,131 @@
+import { Router } from 'express';
+import { z } from 'zod';
+import { prisma } from '../prisma.js';
+import { asyncHandler } from '../middleware/asyncHandler.js';
+import { authRequired, requireRole } from '../middleware/auth.js';
+import { dayKey } from '../utils/analyticsRollup.js';
+
+export const analyticsRouter = Router();
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+function daysAgo(n) {
+  return dayKey(Date.now() - n * DAY_MS);
+}
+
+// Customers are counted by the day of their first order: all-time, or those
+// whose first order fell in [from, to] (new customers in that period).
+function countCustomers(from, to) {
+  return prisma.customerFirstOrder.count(from ? { where: { day: { gte: from, lte: to } } } : undefined);
+}
+
+async function periodStats(from, to) {
+  const [agg, newCustomers] = await Promise.all([
+    prisma.dailyOrderStat.aggregate({
+      where: { day: { gte: from, lte: to } },
+      _sum: { orders: true, revenue: true },
+    }),
+    countCustomers(from, to),
+  ]);
+  return {
+    from,
+    to,
+    orders: agg._sum.orders ?? 0,
+    revenue: agg._sum.revenue ?? 0,
+    newCustomers,
+  };
+}
+
+// Dashboard summary served entirely from the daily rollup tables:
+// all-time totals, orders by status, a daily revenue series for the last
+// `days` days, a current-vs-previous comparison over `compareDays`, category
+// breakdown and top products.
+analyticsRouter.get('/analytics/summary', authRequired, requireRole('ADMIN', 'SUPPORT'), asyncHandler(async (req, res) => {
+  const querySchema = z.object({
+    days: z.coerce.number().int().min(1).max(730).default(180),
+    compareDays: z.coerce.number().int().min(1).max(365).default(30),
+    top: z.coerce.number().int().min(1).max(50).default(5),
+  });
+  const params = querySchema.parse(req.query);
+
+  const [
+    statusRows,
+    dailyRows,
+    categorySales,
+    productSales,
+    categories,
+    productCounts,
+    customers,
+    current,
+    previous,
+  ] = await Promise.all([
+    prisma.dailyOrderStat.groupBy({ by: ['status'], _sum: { orders: true, revenue: true } }),
+    prisma.dailyOrderStat.groupBy({
+      by: ['day'],
+      where: { day: { gte: daysAgo(params.days - 1) } },
+      _sum: { orders: true, revenue: true },
+      orderBy: { day: 'asc' },
+    }),
+    prisma.dailyCategoryStat.groupBy({ by: ['categorySlug'], _sum: { units: true, revenue: true } }),
+    prisma.dailyProductStat.groupBy({
+      by: ['productId'],
+      _sum: { units: true, revenue: true },
+      orderBy: { _sum: { revenue: 'desc' } },
+      take: params.top,
+    }),
+    prisma.category.findMany({ orderBy: { id: 'asc' } }),
+    prisma.product.groupBy({ by: ['categorySlug'], _count: { _all: true } }),
+    countCustomers(),
+    periodStats(daysAgo(params.compareDays - 1), daysAgo(0)),
+    periodStats(daysAgo(2 * params.compareDays - 1), daysAgo(params.compareDays)),
+  ]);
+
+  const byStatus = statusRows.map((r) => ({
+    status: r.status,
+    orders: r._sum.orders ?? 0,
+    revenue: r._sum.revenue ?? 0,
+  }));
+  const totalOrders = byStatus.reduce((sum, r) => sum + r.orders, 0);
+  const totalRevenue = byStatus.reduce((sum, r) => sum + r.revenue, 0);
+
+  const salesBySlug = new Map(categorySales.map((r) => [r.categorySlug, r._sum]));
+  const countBySlug = new Map(productCounts.map((r) => [r.categorySlug, r._count._all]));
+  const categoryRows = categories.map((c) => ({
+    slug: c.slug,
+    name: c.name,
+    products: countBySlug.get(c.slug) ?? 0,
+    units: salesBySlug.get(c.slug)?.units ?? 0,
+    revenue: salesBySlug.get(c.slug)?.revenue ?? 0,
+  }));
+
+  const topIds = productSales.map((r) => r.productId);
+  const topNames = topIds.length
+    ? await prisma.product.findMany({ where: { id: { in: topIds } }, select: { id: true, name: true } })
+    : [];
+  const nameById = new Map(topNames.map((p) => [p.id, p.name]));
+
+  res.json({
+    generatedAt: new Date().toISOString(),
+    totals: {
+      orders: totalOrders,
+      revenue: totalRevenue,
+      averageOrderValue: totalOrders ? totalRevenue / totalOrders : 0,
+      customers,
+      products: productCounts.reduce((sum, r) => sum + r._count._all, 0),
+    },
+    byStatus,
+    period: { days: params.compareDays, current, previous },
+    daily: dailyRows.map((r) => ({
+      day: r.day,
+      orders: r._sum.orders ?? 0,
+      revenue: r._sum.revenue ?? 0,
+    })),
+    categories: categoryRows,
+    topProducts: productSales.map((r) => ({
+      productId: r.productId,
+      name: nameById.get(r.productId) ?? `Product #${r.productId}`,
+      units: r._sum.units ?? 0,
+      revenue: r._sum.revenue ?? 0,
+    })),
+  });
+}));
@@ -0,0 +1,64 @@
+import { Router } from 'express';
+import { z } from 'zod';
+import { prisma } from '../prisma.js';
+import { asyncHandler } from '../middleware/asyncHandler.js';
+import { badRequest, notFound } from '../utils/httpErrors.js';
+import {
+  THUMBNAIL_WIDTHS,
+  cachePath,
+  getDerivative,
+  loadSharp,
+  readCached,
+  sourceHash,
+  thumbnailUrls,
+} from '../utils/imageDerivatives.js';
+
+export const imagesRouter = Router();
+
+const IMMUTABLE = 'public, max-age=31536000, immutable';
+
+function sendImage(res, format, body) {
+  res.set({ 'Content-Type': `image/${format}`, 'Cache-Control': IMMUTABLE, Vary: 'Accept' });
+  res.send(body);
+}
+
+imagesRouter.get('/images/products/:id/:width', asyncHandler(async (req, res) => {
+  const params = z
+    .object({ id: z.coerce.number().int().min(1), width: z.coerce.number().int() })
+    .parse(req.params);
+  const { v } = z.object({ v: z.string().regex(/^[0-9a-f]{16}$/).optional() }).parse(req.query);
+  if (!THUMBNAIL_WIDTHS.includes(params.width)) {
+    throw badRequest(`width must be one of ${THUMBNAIL_WIDTHS.join(', ')}`);
+  }
+
+  const format = req.accepts(['image/webp', 'image/jpeg']) === 'image/webp' ? 'webp' : 'jpeg';
+
+  // Hot path: the versioned URL maps straight to a file on disk.
+  if (v) {
+    const cached = await readCached(cachePath(v, params.width, format));
+    if (cached) return sendImage(res, format, cached);
+  }
+
+  const product = await prisma.product.findUnique({ where: { id: params.id }, select: { image: true } });
+  if (!product?.image) throw notFound('Product not found');
+
+  // Stale or missing version: point the client at the current URL.
+  if (v !== sourceHash(product.image)) {
+    res.set('Cache-Control', 'no-cache');
+    return res.redirect(302, thumbnailUrls(params.id, product.image)[params.width]);
+  }
+
+  const sharp = await loadSharp();
+  if (sharp) {
+    try {
+      return sendImage(res, format, await getDerivative(sharp, product.image, params.width, format));
+    } catch (err) {
+      // eslint-disable-next-line no-console
+      console.warn(`Thumbnail ${params.id}/${params.width} failed: ${err.message}`);
+    }
+  }
+
+  // No resizer available (or the source could not be processed): serve the original.
+  res.set('Cache-Control', 'no-cache');
+  res.redirect(302, product.image);
+}));
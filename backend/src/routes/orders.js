@@ -4,10 +4,14 @@ import { prisma } from '../prisma.js';
 import { asyncHandler } from '../middleware/asyncHandler.js';
 import { authOptional, authRequired } from '../middleware/auth.js';
 import { badRequest, forbidden, notFound } from '../utils/httpErrors.js';
-import { generateOrderNumber } from '../utils/orderNumber.js';
+import { nextOrderNumber } from '../utils/orderNumber.js';
+import { recordOrderCreated, recordStatusChange } from '../utils/analyticsRollup.js';
+import { invalidateOrderCounts } from '../utils/orderSearch.js';
 
 export const ordersRouter = Router();
 
+class StalePricesError extends Error {}
+
 const createOrderSchema = z.object({
   customer: z.object({
     name: z.string().min(1),
@@ -38,60 +42,96 @@ ordersRouter.post('/orders', authOptional, asyncHandler(async (req, res) => {
   const body = createOrderSchema.parse(req.body);
 
   const productIds = [...new Set(body.items.map(i => i.productId))];
-  const products = await prisma.product.findMany({ where: { id: { in: productIds } } });
-  if (products.length !== productIds.length) throw badRequest('One or more products not found');
-
-  const productById = new Map(products.map(p => [p.id, p]));
-
-  const orderItems = body.items.map((item) => {
-    const product = productById.get(item.productId);
-    const unitPrice = product.price;
-    const lineTotal = unitPrice * item.quantity;
-    return {
-      productId: item.productId,
-      quantity: item.quantity,
-      unitPrice,
-      lineTotal,
-      selectedSize: item.selectedSize,
-      selectedColor: item.selectedColor,
-    };
-  });
 
-  const subtotal = orderItems.reduce((sum, i) => sum + i.lineTotal, 0);
-  const discount = 0;
-  const shipping = subtotal >= 5000 ? 0 : 250;
-  const total = subtotal - discount + shipping;
-
-  // Ensure unique order number (retry a few times)
-  let orderNumber = generateOrderNumber();
-  for (let i = 0; i < 5; i += 1) {
-    // eslint-disable-next-line no-await-in-loop
-    const exists = await prisma.order.findUnique({ where: { orderNumber } });
-    if (!exists) break;
-    orderNumber = generateOrderNumber();
+  const readProducts = (db) => db.product.findMany({
+    where: { id: { in: productIds } },
+    select: { id: true, price: true, categorySlug: true },
+    orderBy: { id: 'asc' },
+  });
+  const pricingKey = (products) => products.map(p => `${p.id}:${p.price}:${p.categorySlug}`).join(',');
+
+  // Prices are read before the transaction so that its first statement is the
+  // insert: SQLite transactions start deferred, and one that reads first
+  // fails with SQLITE_BUSY instead of waiting when it has to upgrade to a
+  // writer under contention. Once the insert holds the write lock the prices
+  // are read again; if any changed in between, the transaction rolls back
+  // and the order is priced again.
+  const insertOrder = async (orderNumber) => {
+    const products = await readProducts(prisma);
+    if (products.length !== productIds.length) throw badRequest('One or more products not found');
+
+    const productById = new Map(products.map(p => [p.id, p]));
+
+    const orderItems = body.items.map((item) => {
+      const product = productById.get(item.productId);
+      const unitPrice = product.price;
+      const lineTotal = unitPrice * item.quantity;
+      return {
+        productId: item.productId,
+        quantity: item.quantity,
+        unitPrice,
+        lineTotal,
+        selectedSize: item.selectedSize,
+        selectedColor: item.selectedColor,
+      };
+    });
+
+    const subtotal = orderItems.reduce((sum, i) => sum + i.lineTotal, 0);
+    const discount = 0;
+    const shipping = subtotal >= 5000 ? 0 : 250;
+    const total = subtotal - discount + shipping;
+
+    return prisma.$transaction(async (tx) => {
+      const order = await tx.order.create({
+        data: {
+          orderNumber,
+          userId: req.user?.sub ?? null,
+          subtotal,
+          discount,
+          shipping,
+          total,
+          customerName: body.customer.name,
+          customerEmail: body.customer.email.toLowerCase(),
+          customerPhone: body.customer.phone,
+          shipLine1: body.shippingAddress.line1,
+          shipLine2: body.shippingAddress.line2,
+          shipCity: body.shippingAddress.city,
+          shipState: body.shippingAddress.state,
+          shipPostal: body.shippingAddress.postalCode,
+          shipCountryCode: body.shippingAddress.countryCode.toUpperCase(),
+          items: { create: orderItems },
+        },
+        include: { items: true },
+      });
+
+      if (pricingKey(await readProducts(tx)) !== pricingKey(products)) {
+        throw new StalePricesError('Product prices changed while placing the order');
+      }
+
+      await recordOrderCreated(
+        tx,
+        order,
+        orderItems.map((item) => ({ ...item, categorySlug: productById.get(item.productId).categorySlug }))
+      );
+      return order;
+    });
+  };
+
+  // Sequence numbers never repeat, but can land on one of the randomly drawn
+  // numbers of orders placed before the sequence existed; skip those. A
+  // price change between reading and inserting just prices the order again.
+  let created;
+  for (let attempt = 1; !created; attempt += 1) {
+    try {
+      // eslint-disable-next-line no-await-in-loop
+      created = await insertOrder(await nextOrderNumber());
+    } catch (e) {
+      const duplicateNumber = e.code === 'P2002' && String(e.meta?.target ?? '').includes('orderNumber');
+      if (!(duplicateNumber || e instanceof StalePricesError) || attempt >= 5) throw e;
+    }
   }
 
-  const created = await prisma.order.create({
-    data: {
-      orderNumber,
-      userId: req.user?.sub ?? null,
-      subtotal,
-      discount,
-      shipping,
-      total,
-      customerName: body.customer.name,
-      customerEmail: body.customer.email.toLowerCase(),
-      customerPhone: body.customer.phone,
-      shipLine1: body.shippingAddress.line1,
-      shipLine2: body.shippingAddress.line2,
-      shipCity: body.shippingAddress.city,
-      shipState: body.shippingAddress.state,
-      shipPostal: body.shippingAddress.postalCode,
-      shipCountryCode: body.shippingAddress.countryCode.toUpperCase(),
-      items: { create: orderItems },
-    },
-    include: { items: true },
-  });
+  invalidateOrderCounts();
 
   const estimatedDeliveryDate = new Date(Date.now() + 6 * 24 * 60 * 60 * 1000).toISOString();
 
@@ -162,20 +202,23 @@ ordersRouter.post('/orders/:orderNumber/confirm-delivery', authRequired, asyncHa
     throw badRequest('Order must be shipped before it can be marked as delivered');
   }
 
-  const updated = await prisma.order.update({
-    where: { orderNumber },
-    data: {
-      status: 'DELIVERED',
-      deliveredAt: new Date(),
-      supportLogs: {
-        create: {
-          actorUserId: req.user.sub,
-          action: 'CUSTOMER_CONFIRM_DELIVERY',
-          detailsJson: JSON.stringify({ confirmedAt: new Date().toISOString() }),
-        },
+  // Guarded on SHIPPED so a racing status change can't be rolled up twice.
+  const updated = await prisma.$transaction(async (tx) => {
+    const data = { status: 'DELIVERED', deliveredAt: new Date() };
+    const { count } = await tx.order.updateMany({ where: { id: order.id, status: 'SHIPPED' }, data });
+    if (!count) throw badRequest('Order must be shipped before it can be marked as delivered');
+    await tx.supportActionLog.create({
+      data: {
+        orderId: order.id,
+        actorUserId: req.user.sub,
+        action: 'CUSTOMER_CONFIRM_DELIVERY',
+        detailsJson: JSON.stringify({ confirmedAt: new Date().toISOString() }),
       },
-    },
+    });
+    await recordStatusChange(tx, order, 'SHIPPED', data.status);
+    return { ...order, ...data };
   });
+  invalidateOrderCounts();
 
   res.json({ order: { orderNumber: updated.orderNumber, status: updated.status } });
 }));
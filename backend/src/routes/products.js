@@ -1,8 +1,15 @@
+import { once } from 'node:events';
 import { Router } from 'express';
 import { z } from 'zod';
 import { prisma } from '../prisma.js';
 import { asyncHandler } from '../middleware/asyncHandler.js';
 import { authRequired, requireRole } from '../middleware/auth.js';
+import { catalogCache } from '../middleware/catalogCache.js';
+import { bumpCatalogVersion } from '../utils/catalogCache.js';
+import { searchProductIds, toMatchQuery } from '../utils/productSearch.js';
+import { thumbnailUrls } from '../utils/imageDerivatives.js';
+import { CSV_COLUMNS, readCsvRows, readNdjsonRows, toCsvRow } from '../utils/catalogTransfer.js';
+import { badRequest } from '../utils/httpErrors.js';
 
 export const productsRouter = Router();
 
@@ -25,20 +32,20 @@ function normalizeProduct(p) {
   // and omit internal *Json fields.
   // eslint-disable-next-line no-unused-vars
   const { imagesJson, colorsJson, sizesJson, ...rest } = p;
-  return { ...rest, images, colors, sizes };
+  return { ...rest, images, colors, sizes, thumbnails: thumbnailUrls(p.id, p.image) };
 }
 
-productsRouter.get('/countries', asyncHandler(async (req, res) => {
+productsRouter.get('/countries', catalogCache, asyncHandler(async (req, res) => {
   const countries = await prisma.country.findMany({ orderBy: { id: 'asc' } });
   res.json({ countries });
 }));
 
-productsRouter.get('/categories', asyncHandler(async (req, res) => {
+productsRouter.get('/categories', catalogCache, asyncHandler(async (req, res) => {
   const categories = await prisma.category.findMany({ orderBy: { id: 'asc' } });
   res.json({ categories });
 }));
 
-productsRouter.get('/products', asyncHandler(async (req, res) => {
+productsRouter.get('/products', catalogCache, asyncHandler(async (req, res) => {
   //console.log(req.query)
   const querySchema = z.object({
     category: z.string().optional(),
@@ -47,7 +54,7 @@ productsRouter.get('/products', asyncHandler(async (req, res) => {
     maxPrice: z.coerce.number().int().optional(),
     colors: z.string().optional(),
     sizes: z.string().optional(),
-    sort: z.enum(['latest', 'price_asc', 'price_desc']).optional(),
+    sort: z.enum(['relevance', 'latest', 'price_asc', 'price_desc']).optional(),
     page: z.coerce.number().int().min(1).optional(),
     limit: z.coerce.number().int().min(1).max(100).optional(),
   });
@@ -61,14 +68,6 @@ productsRouter.get('/products', asyncHandler(async (req, res) => {
 
   const where = {
     ...(q.category ? { categorySlug: q.category } : {}),
-    ...(q.q
-      ? {
-          OR: [
-            { name: { contains: q.q } },
-            { description: { contains: q.q } },
-          ],
-        }
-      : {}),
     ...(q.minPrice != null || q.maxPrice != null
       ? {
           price: {
@@ -77,32 +76,58 @@ productsRouter.get('/products', asyncHandler(async (req, res) => {
           },
         }
       : {}),
+    ...(colors.length ? { colorOptions: { some: { value: { in: colors } } } } : {}),
+    ...(sizes.length ? { sizeOptions: { some: { value: { in: sizes } } } } : {}),
   };
 
+  // Text queries go through the FTS5 index and default to relevance order.
+  if (q.q) {
+    const match = toMatchQuery(q.q);
+    const { total, ids } = match
+      ? await searchProductIds({
+          match,
+          category: q.category,
+          minPrice: q.minPrice,
+          maxPrice: q.maxPrice,
+          colors,
+          sizes,
+          sort: q.sort,
+          skip: (page - 1) * limit,
+          take: limit,
+        })
+      : { total: 0, ids: [] };
+
+    const rows = ids.length ? await prisma.product.findMany({ where: { id: { in: ids } } }) : [];
+    const rowById = new Map(rows.map(p => [p.id, p]));
+    return res.json({
+      items: ids.map(id => rowById.get(id)).filter(Boolean).map(normalizeProduct),
+      page,
+      limit,
+      total,
+      totalPages: Math.ceil(total / limit),
+    });
+  }
+
+  // id tie-breaker keeps LIMIT/OFFSET pages stable when sort keys collide.
   const orderBy =
     q.sort === 'price_asc'
-      ? { price: 'asc' }
+      ? [{ price: 'asc' }, { id: 'asc' }]
       : q.sort === 'price_desc'
-      ? { price: 'desc' }
-      : { createdAt: 'desc' };
+      ? [{ price: 'desc' }, { id: 'desc' }]
+      : [{ createdAt: 'desc' }, { id: 'desc' }];
 
-  // SQLite JSON filtering support is limited; filter colors/sizes in JS.
-  const baseItemsRaw = await prisma.product.findMany({ where, orderBy });
-  const baseItems = baseItemsRaw.map(normalizeProduct);
+  const [total, rows] = await prisma.$transaction([
+    prisma.product.count({ where }),
+    prisma.product.findMany({
+      where,
+      orderBy,
+      skip: (page - 1) * limit,
+      take: limit,
+    }),
+  ]);
 
-  const filtered = baseItems.filter((p) => {
-    const productColors = Array.isArray(p.colors) ? p.colors : [];
-    const productSizes = Array.isArray(p.sizes) ? p.sizes : [];
-
-    const colorOk = colors.length === 0 || colors.some(c => productColors.includes(c));
-    const sizeOk = sizes.length === 0 || sizes.some(s => productSizes.includes(s));
-    return colorOk && sizeOk;
-  });
-
-  const total = filtered.length;
-  const items = filtered.slice((page - 1) * limit, page * limit);
   res.json({
-    items,
+    items: rows.map(normalizeProduct),
     page,
     limit,
     total,
@@ -110,7 +135,45 @@ productsRouter.get('/products', asyncHandler(async (req, res) => {
   });
 }));
 
-productsRouter.get('/products/:id', asyncHandler(async (req, res) => {
+// Full catalog as NDJSON (one normalized product per line) or CSV, read in id
+// order a page at a time so memory stays flat however large the catalog is.
+const EXPORT_PAGE_SIZE = 500;
+
+productsRouter.get('/products/export', catalogCache, asyncHandler(async (req, res) => {
+  const q = z
+    .object({ format: z.enum(['ndjson', 'csv']).optional(), category: z.string().optional() })
+    .parse(req.query);
+  const csv = q.format === 'csv';
+
+  res.type(csv ? 'text/csv' : 'application/x-ndjson');
+  if (csv) res.write(toCsvRow(CSV_COLUMNS));
+
+  try {
+    let lastId = 0;
+    while (!res.destroyed) {
+      const rows = await prisma.product.findMany({
+        where: { id: { gt: lastId }, ...(q.category ? { categorySlug: q.category } : {}) },
+        orderBy: { id: 'asc' },
+        take: EXPORT_PAGE_SIZE,
+      });
+      if (!rows.length) break;
+      const chunk = rows
+        .map(normalizeProduct)
+        .map((p) => (csv ? toCsvRow(CSV_COLUMNS.map((c) => p[c])) : `${JSON.stringify(p)}\n`))
+        .join('');
+      if (!res.write(chunk)) await once(res, 'drain');
+      lastId = rows[rows.length - 1].id;
+      if (rows.length < EXPORT_PAGE_SIZE) break;
+    }
+    res.end();
+  } catch (err) {
+    // Headers are already out, so the error handler can't answer; cut the
+    // stream instead of letting a truncated export look complete.
+    res.destroy(err);
+  }
+}));
+
+productsRouter.get('/products/:id', catalogCache, asyncHandler(async (req, res) => {
   const id = Number(req.params.id);
   const productRaw = await prisma.product.findUnique({ where: { id } });
   const product = productRaw ? normalizeProduct(productRaw) : null;
@@ -139,6 +202,19 @@ function serializeArray(value) {
   return JSON.stringify(Array.isArray(value) ? value : []);
 }
 
+function uniqueValues(value) {
+  return [...new Set(Array.isArray(value) ? value : [])];
+}
+
+// Nested writes keeping ProductColor/ProductSize in sync with the JSON columns.
+function optionsCreate(values) {
+  return { create: uniqueValues(values).map((value) => ({ value })) };
+}
+
+function optionsReplace(values) {
+  return { deleteMany: {}, ...optionsCreate(values) };
+}
+
 function buildCreatePayload(data) {
   return {
     name: data.name,
@@ -153,6 +229,8 @@ function buildCreatePayload(data) {
     sizesJson: serializeArray(data.sizes ?? []),
     fabric: data.fabric ?? null,
     description: data.description ?? null,
+    colorOptions: optionsCreate(data.colors),
+    sizeOptions: optionsCreate(data.sizes),
   };
 }
 
@@ -166,8 +244,14 @@ function buildUpdatePayload(data) {
   if (data.images !== undefined) payload.imagesJson = serializeArray(data.images);
   if (data.sale !== undefined) payload.sale = data.sale;
   if (data.discount !== undefined) payload.discount = data.discount;
-  if (data.colors !== undefined) payload.colorsJson = serializeArray(data.colors);
-  if (data.sizes !== undefined) payload.sizesJson = serializeArray(data.sizes);
+  if (data.colors !== undefined) {
+    payload.colorsJson = serializeArray(data.colors);
+    payload.colorOptions = optionsReplace(data.colors);
+  }
+  if (data.sizes !== undefined) {
+    payload.sizesJson = serializeArray(data.sizes);
+    payload.sizeOptions = optionsReplace(data.sizes);
+  }
   if (data.fabric !== undefined) payload.fabric = data.fabric ?? null;
   if (data.description !== undefined) payload.description = data.description ?? null;
   return payload;
@@ -176,6 +260,7 @@ function buildUpdatePayload(data) {
 productsRouter.post('/products', authRequired, requireRole('ADMIN'), asyncHandler(async (req, res) => {
   const parsed = productCreateSchema.parse(req.body);
   const product = await prisma.product.create({ data: buildCreatePayload(parsed) });
+  bumpCatalogVersion();
   res.status(201).json({ product: normalizeProduct(product) });
 }));
 
@@ -185,11 +270,137 @@ productsRouter.patch('/products/:id', authRequired, requireRole('ADMIN'), asyncH
   if (!existing) return res.status(404).json({ error: { message: 'Product not found' } });
   const parsed = productUpdateSchema.parse(req.body);
   const updated = await prisma.product.update({ where: { id }, data: buildUpdatePayload(parsed) });
+  bumpCatalogVersion();
   res.json({ product: normalizeProduct(updated) });
 }));
 
 productsRouter.delete('/products/:id', authRequired, requireRole('ADMIN'), asyncHandler(async (req, res) => {
   const id = Number(req.params.id);
   const deleted = await prisma.product.delete({ where: { id } });
+  bumpCatalogVersion();
   res.json({ product: normalizeProduct(deleted) });
 }));
+
+// ---------------- bulk import ----------------
+// POST /products/import with an NDJSON (application/x-ndjson) or CSV (text/csv)
+// body. Rows carrying the id of an existing product update only the fields
+// they contain; every other row creates a product (with that id, if given).
+// Rows are validated and written as they stream in, in batches of
+// CATALOG_IMPORT_BATCH_SIZE per transaction. The response is NDJSON too: an
+// `error` line per rejected row, a `batch` line per committed batch and a
+// final `summary`.
+const IMPORT_BATCH_SIZE = Number(process.env.CATALOG_IMPORT_BATCH_SIZE ?? 200);
+
+const importIdSchema = z.coerce.number().int().min(1).optional();
+
+function zodDetails(error) {
+  return error.issues.map((issue) => ({ path: issue.path.join('.'), message: issue.message }));
+}
+
+async function writeImportBatch(rows, categorySlugs) {
+  const errors = [];
+  const writes = [];
+
+  const ids = rows.map((r) => r.id).filter(Boolean);
+  const existing = ids.length
+    ? new Set((await prisma.product.findMany({ where: { id: { in: ids } }, select: { id: true } })).map((p) => p.id))
+    : new Set();
+
+  for (const row of rows) {
+    const isUpdate = existing.has(row.id);
+    const parsed = (isUpdate ? productUpdateSchema : productCreateSchema).safeParse(row.value);
+    if (!parsed.success) {
+      errors.push({ line: row.line, message: 'Invalid product', details: zodDetails(parsed.error) });
+      continue;
+    }
+    if (parsed.data.categorySlug !== undefined && !categorySlugs.has(parsed.data.categorySlug)) {
+      errors.push({ line: row.line, message: `Unknown category: ${parsed.data.categorySlug}` });
+      continue;
+    }
+    writes.push({
+      line: row.line,
+      isUpdate,
+      run: () =>
+        isUpdate
+          ? prisma.product.update({ where: { id: row.id }, data: buildUpdatePayload(parsed.data) })
+          : prisma.product.create({
+              data: { ...(row.id ? { id: row.id } : {}), ...buildCreatePayload(parsed.data) },
+            }),
+    });
+  }
+
+  let committed = [];
+  try {
+    await prisma.$transaction(writes.map((w) => w.run()));
+    committed = writes;
+  } catch {
+    // Something in the batch failed at the database level (e.g. a duplicate
+    // id within the batch). Retry row by row to report exactly which.
+    for (const w of writes) {
+      try {
+        await w.run();
+        committed.push(w);
+      } catch (err) {
+        errors.push({ line: w.line, message: err.message.split('\n').pop().trim() || 'Write failed' });
+      }
+    }
+  }
+
+  const updated = committed.filter((w) => w.isUpdate).length;
+  return { created: committed.length - updated, updated, errors };
+}
+
+productsRouter.post('/products/import', authRequired, requireRole('ADMIN'), asyncHandler(async (req, res) => {
+  const reader = req.is('text/csv')
+    ? readCsvRows
+    : req.is(['application/x-ndjson', 'application/ndjson', 'application/jsonl'])
+    ? readNdjsonRows
+    : null;
+  if (!reader) throw badRequest('Send the catalog as text/csv or application/x-ndjson');
+
+  const categorySlugs = new Set((await prisma.category.findMany({ select: { slug: true } })).map((c) => c.slug));
+  const totals = { rows: 0, created: 0, updated: 0, failed: 0, batches: 0 };
+  const send = (message) => res.write(`${JSON.stringify(message)}\n`);
+
+  res.type('application/x-ndjson');
+
+  let batch = [];
+  const flush = async () => {
+    if (!batch.length) return;
+    const result = await writeImportBatch(batch, categorySlugs);
+    batch = [];
+    totals.batches += 1;
+    totals.created += result.created;
+    totals.updated += result.updated;
+    totals.failed += result.errors.length;
+    if (result.created || result.updated) bumpCatalogVersion();
+    result.errors.forEach((e) => send({ type: 'error', ...e }));
+    send({ type: 'batch', batch: totals.batches, created: result.created, updated: result.updated, failed: result.errors.length });
+  };
+
+  try {
+    for await (const row of reader(req)) {
+      totals.rows += 1;
+      if (row.error) {
+        totals.failed += 1;
+        send({ type: 'error', line: row.line, message: row.error });
+        continue;
+      }
+      const isObject = row.value !== null && typeof row.value === 'object' && !Array.isArray(row.value);
+      const id = importIdSchema.safeParse(isObject ? row.value.id : undefined);
+      if (!isObject || !id.success) {
+        totals.failed += 1;
+        send({ type: 'error', line: row.line, message: isObject ? 'Invalid id' : 'Expected a product object' });
+        continue;
+      }
+      const { id: _ignored, ...value } = row.value; // eslint-disable-line no-unused-vars
+      batch.push({ line: row.line, id: id.data, value });
+      if (batch.length >= IMPORT_BATCH_SIZE) await flush();
+    }
+    await flush();
+    send({ type: 'summary', ...totals });
+    res.end();
+  } catch (err) {
+    res.destroy(err);
+  }
+}));
@@ -4,80 +4,99 @@ import { prisma } from '../prisma.js';
 import { asyncHandler } from '../middleware/asyncHandler.js';
 import { authRequired, requireRole } from '../middleware/auth.js';
 import { supportRateLimiter } from '../middleware/rateLimit.js';
-import * as warehouse from '../integrations/warehouse.js';
 import { badRequest, notFound, forbidden } from '../utils/httpErrors.js';
+import { recordStatusChange } from '../utils/analyticsRollup.js';
+import { enqueueWarehouseCall, kickWarehouseDispatcher, outboxStatus } from '../utils/warehouseOutbox.js';
+import { cachedOrderCount, countSearchOrders, invalidateOrderCounts, searchOrderIds } from '../utils/orderSearch.js';
+import { toMatchQuery } from '../utils/productSearch.js';
 
 export const supportRouter = Router();
 
 supportRouter.use(authRequired, requireRole('ADMIN', 'SUPPORT'));
 supportRouter.use(supportRateLimiter);
 
+const orderStatusSchema = z.enum(['PLACED', 'PACKING', 'SHIPPED', 'DELIVERED', 'CANCELLED']);
+
 const orderListSchema = z.object({
   q: z.string().min(1).optional(),
-  status: z.enum(['PLACED', 'PACKING', 'SHIPPED', 'DELIVERED', 'CANCELLED']).optional(),
-  page: z.coerce.number().int().min(1).default(1),
+  status: orderStatusSchema.optional(),
+  cursor: z.string().min(1).optional(),
   limit: z.coerce.number().int().min(1).max(50).default(10),
 });
 
+// Only what the listing renders; product rows are reduced to id/name/image.
+const orderListSelect = {
+  id: true,
+  orderNumber: true,
+  status: true,
+  createdAt: true,
+  customerName: true,
+  customerEmail: true,
+  total: true,
+  subtotal: true,
+  shipping: true,
+  items: {
+    select: {
+      id: true,
+      productId: true,
+      quantity: true,
+      unitPrice: true,
+      lineTotal: true,
+      selectedColor: true,
+      selectedSize: true,
+      product: { select: { id: true, name: true, image: true } },
+    },
+  },
+};
+
+// Keyset pagination on (createdAt, id), newest first: `cursor` is the id of
+// the last order of the previous page and the response carries `nextCursor`,
+// so every page costs the same however deep it is.
 supportRouter.get('/support/orders', asyncHandler(async (req, res) => {
   const params = orderListSchema.parse(req.query);
+  const match = toMatchQuery(params.q);
+  const take = params.limit + 1;
 
-  const where = {
-    ...(params.status ? { status: params.status } : {}),
-    ...(params.q
-      ? {
-          OR: [
-            { orderNumber: { contains: params.q, mode: 'insensitive' } },
-            { customerName: { contains: params.q, mode: 'insensitive' } },
-            { customerEmail: { contains: params.q, mode: 'insensitive' } },
-          ],
-        }
-      : {}),
-  };
+  let orders;
+  if (match) {
+    const ids = await searchOrderIds({ match, status: params.status, cursor: params.cursor, take });
+    const rows = ids.length
+      ? await prisma.order.findMany({ where: { id: { in: ids } }, select: orderListSelect })
+      : [];
+    const rowById = new Map(rows.map((r) => [r.id, r]));
+    orders = ids.map((id) => rowById.get(id)).filter(Boolean);
+  } else {
+    orders = await prisma.order.findMany({
+      where: params.status ? { status: params.status } : {},
+      orderBy: [{ createdAt: 'desc' }, { id: 'desc' }],
+      take,
+      ...(params.cursor ? { cursor: { id: params.cursor }, skip: 1 } : {}),
+      select: orderListSelect,
+    });
+  }
 
-  const total = await prisma.order.count({ where });
-  const orders = await prisma.order.findMany({
-    where,
-    orderBy: { createdAt: 'desc' },
-    skip: (params.page - 1) * params.limit,
-    take: params.limit,
-    include: { items: { include: { product: true } } },
-  });
+  const hasMore = orders.length > params.limit;
+  if (hasMore) orders = orders.slice(0, params.limit);
 
-  const formatted = orders.map((order) => ({
-    orderNumber: order.orderNumber,
-    status: order.status,
-    createdAt: order.createdAt,
-    customerName: order.customerName,
-    customerEmail: order.customerEmail,
-    total: order.total,
-    subtotal: order.subtotal,
-    shipping: order.shipping,
-    itemsCount: order.items.length,
-    items: order.items.map((item) => ({
-      id: item.id,
-      productId: item.productId,
-      quantity: item.quantity,
-      unitPrice: item.unitPrice,
-      lineTotal: item.lineTotal,
-      selectedColor: item.selectedColor,
-      selectedSize: item.selectedSize,
-      product: item.product
-        ? {
-            id: item.product.id,
-            name: item.product.name,
-            image: item.product.image,
-          }
-        : null,
-    })),
+  const total = await cachedOrderCount(`${params.status ?? ''}|${match ?? ''}`, () =>
+    match
+      ? countSearchOrders({ match, status: params.status })
+      : prisma.order.count({ where: params.status ? { status: params.status } : {} })
+  );
+
+  // eslint-disable-next-line no-unused-vars
+  const formatted = orders.map(({ id, items, ...order }) => ({
+    ...order,
+    itemsCount: items.length,
+    items,
   }));
 
   res.json({
     orders: formatted,
-    page: params.page,
     limit: params.limit,
     total,
     totalPages: Math.max(1, Math.ceil(total / params.limit)),
+    nextCursor: hasMore ? orders[orders.length - 1].id : null,
   });
 }));
 
@@ -126,35 +145,34 @@ supportRouter.patch('/support/orders/:orderNumber/address', asyncHandler(async (
     throw badRequest('Address can no longer be changed: order already shipped');
   }
 
-  const updated = await prisma.order.update({
-    where: { orderNumber },
-    data: {
-      shipLine1: body.shippingAddress.line1,
-      shipLine2: body.shippingAddress.line2,
-      shipCity: body.shippingAddress.city,
-      shipState: body.shippingAddress.state,
-      shipPostal: body.shippingAddress.postalCode,
-      shipCountryCode: body.shippingAddress.countryCode.toUpperCase(),
-      supportLogs: {
-        create: {
-          actorUserId: req.user.sub,
-          action: 'CHANGE_ADDRESS',
-          detailsJson: JSON.stringify({
-            reason: body.reason ?? null,
-            updatedAt: new Date().toISOString(),
-          }),
+  // The warehouse label update is queued in the same transaction and delivered
+  // by the outbox dispatcher, so the request doesn't wait on the WMS.
+  const [updated, outbox] = await prisma.$transaction(async (tx) => {
+    const next = await tx.order.update({
+      where: { orderNumber },
+      data: {
+        shipLine1: body.shippingAddress.line1,
+        shipLine2: body.shippingAddress.line2,
+        shipCity: body.shippingAddress.city,
+        shipState: body.shippingAddress.state,
+        shipPostal: body.shippingAddress.postalCode,
+        shipCountryCode: body.shippingAddress.countryCode.toUpperCase(),
+        supportLogs: {
+          create: {
+            actorUserId: req.user.sub,
+            action: 'CHANGE_ADDRESS',
+            detailsJson: JSON.stringify({
+              reason: body.reason ?? null,
+              updatedAt: new Date().toISOString(),
+            }),
+          },
         },
       },
-    },
+    });
+    const queued = await enqueueWarehouseCall(tx, orderNumber, 'LABEL', { shippingAddress: body.shippingAddress });
+    return [next, queued];
   });
-
-  // Notify warehouse / WMS of label update (stubbed integration)
-  let warehouseResult = null;
-  try {
-    warehouseResult = await warehouse.updateShippingLabel(orderNumber, body.shippingAddress);
-  } catch (e) {
-    // No-op on integration failure; logged via support action
-  }
+  kickWarehouseDispatcher();
 
   res.json({
     order: {
@@ -167,15 +185,82 @@ supportRouter.patch('/support/orders/:orderNumber/address', asyncHandler(async (
       shipPostal: updated.shipPostal,
       shipCountryCode: updated.shipCountryCode,
       updatedAt: updated.updatedAt,
-      warehouse: warehouseResult,
+      warehouse: outboxStatus(outbox),
+    },
+  });
+}));
+
+// Status change + audit log + analytics rollup + queued warehouse push, all in
+// the caller's transaction. The update is guarded on the status the caller
+// read, so two racing changes can't both move the order out of the same
+// rollup bucket. When the guard misses, the UPDATE has still taken SQLite's
+// write lock, so re-reading gives the committed status to apply against.
+async function applyStatusChange(tx, order, status, reason, actorUserId) {
+  let current = order;
+  let data = statusData(current, status);
+  let { count } = await tx.order.updateMany({ where: { id: current.id, status: current.status }, data });
+  if (!count) {
+    current = await tx.order.findUnique({ where: { id: order.id } });
+    if (!current) return null;
+    data = statusData(current, status);
+    ({ count } = await tx.order.updateMany({ where: { id: current.id, status: current.status }, data }));
+    if (!count) throw new Error(`Order ${order.orderNumber} changed during status update`);
+  }
+  await tx.supportActionLog.create({
+    data: {
+      orderId: current.id,
+      actorUserId,
+      action: 'UPDATE_STATUS',
+      detailsJson: JSON.stringify({ status, reason: reason ?? null }),
     },
   });
+  await recordStatusChange(tx, current, current.status, status);
+  await enqueueWarehouseCall(tx, current.orderNumber, 'STATUS', { status });
+  return { ...current, ...data };
+}
+
+function statusData(order, status) {
+  return {
+    status,
+    shippedAt: status === 'SHIPPED' ? new Date() : order.shippedAt,
+    deliveredAt: status === 'DELIVERED' ? new Date() : order.deliveredAt,
+  };
+}
+
+supportRouter.patch('/support/orders/status', asyncHandler(async (req, res) => {
+  const bodySchema = z.object({
+    orderNumbers: z.array(z.string().min(3)).min(1).max(200),
+    status: orderStatusSchema,
+    reason: z.string().optional(),
+  });
+  const body = bodySchema.parse(req.body);
+  const orderNumbers = [...new Set(body.orderNumbers)];
+
+  // Read outside the transaction so its first statement is a write (see
+  // applyStatusChange for how stale reads are handled).
+  const orders = await prisma.order.findMany({ where: { orderNumber: { in: orderNumbers } } });
+  const updated = await prisma.$transaction(async (tx) => {
+    const results = [];
+    for (const order of orders) {
+      const next = await applyStatusChange(tx, order, body.status, body.reason, req.user.sub);
+      if (next) results.push(next);
+    }
+    return results;
+  });
+  invalidateOrderCounts();
+  kickWarehouseDispatcher();
+
+  const found = new Set(updated.map((o) => o.orderNumber));
+  res.json({
+    orders: updated.map((o) => ({ orderNumber: o.orderNumber, status: o.status })),
+    notFound: orderNumbers.filter((n) => !found.has(n)),
+  });
 }));
 
 supportRouter.patch('/support/orders/:orderNumber/status', asyncHandler(async (req, res) => {
   const paramsSchema = z.object({ orderNumber: z.string().min(3) });
   const bodySchema = z.object({
-    status: z.enum(['PLACED', 'PACKING', 'SHIPPED', 'DELIVERED', 'CANCELLED']),
+    status: orderStatusSchema,
     reason: z.string().optional(),
   });
 
@@ -185,28 +270,22 @@ supportRouter.patch('/support/orders/:orderNumber/status', asyncHandler(async (r
   const order = await prisma.order.findUnique({ where: { orderNumber } });
   if (!order) throw notFound('Order not found');
 
-  const updated = await prisma.order.update({
-    where: { orderNumber },
-    data: {
-      status: body.status,
-      shippedAt: body.status === 'SHIPPED' ? new Date() : order.shippedAt,
-      deliveredAt: body.status === 'DELIVERED' ? new Date() : order.deliveredAt,
-      supportLogs: {
-        create: {
-          actorUserId: req.user.sub,
-          action: 'UPDATE_STATUS',
-          detailsJson: JSON.stringify({ status: body.status, reason: body.reason ?? null }),
-        },
-      },
-    },
-  });
-
-  // Push status to warehouse / WMS (stubbed integration)
-  try {
-    await warehouse.pushStatus(orderNumber, body.status);
-  } catch (e) {
-    // ignore integration failures for now
-  }
+  const updated = await prisma.$transaction((tx) =>
+    applyStatusChange(tx, order, body.status, body.reason, req.user.sub)
+  );
+  if (!updated) throw notFound('Order not found');
+  invalidateOrderCounts();
+  kickWarehouseDispatcher();
 
   res.json({ order: { orderNumber: updated.orderNumber, status: updated.status } });
 }));
+
+supportRouter.get('/support/orders/:orderNumber/warehouse', asyncHandler(async (req, res) => {
+  const { orderNumber } = z.object({ orderNumber: z.string().min(3) }).parse(req.params);
+  const rows = await prisma.warehouseOutbox.findMany({
+    where: { orderNumber },
+    orderBy: { id: 'desc' },
+    take: 20,
+  });
+  res.json({ orderNumber, calls: rows.map(outboxStatus) });
+}));
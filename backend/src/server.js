@@ -7,7 +7,11 @@ import { productsRouter } from './routes/products.js';
 import { authRouter } from './routes/auth.js';
 import { ordersRouter } from './routes/orders.js';
 import { supportRouter } from './routes/support.js';
+import { analyticsRouter } from './routes/analytics.js';
+import { imagesRouter } from './routes/images.js';
 import { errorHandler } from './middleware/errorHandler.js';
+import { startWarehouseDispatcher } from './utils/warehouseOutbox.js';
+import { configureDatabase } from './prisma.js';
 
 const app = express();
 
@@ -27,8 +31,10 @@ app.get('/health', (req, res) => {
 });
 
 app.use('/api', productsRouter);
+app.use('/api', imagesRouter);
 app.use('/api', authRouter);
 app.use('/api', ordersRouter);
+app.use('/api', analyticsRouter);
 app.use('/api', supportRouter);
 
 app.use((req, res) => {
@@ -38,7 +44,9 @@ app.use((req, res) => {
 app.use(errorHandler);
 
 const port = Number(process.env.PORT ?? 4000);
+await configureDatabase();
 app.listen(port, () => {
   // eslint-disable-next-line no-console
   console.log(`API listening on http://localhost:${port}`);
+  startWarehouseDispatcher();
 });
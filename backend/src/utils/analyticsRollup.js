@@ -0,0 +1,74 @@
+// Incremental maintenance of the Daily*Stat analytics tables.
+// Every function takes a Prisma client or interactive-transaction client so it
+// can run inside the same transaction as the order write it accounts for.
+
+export function dayKey(date) {
+  return new Date(date).toISOString().slice(0, 10);
+}
+
+async function bumpOrderStat(db, day, status, orders, revenue) {
+  await db.dailyOrderStat.upsert({
+    where: { day_status: { day, status } },
+    create: { day, status, orders, revenue },
+    update: { orders: { increment: orders }, revenue: { increment: revenue } },
+  });
+}
+
+// lines: [{ productId, categorySlug, quantity, lineTotal }]
+export async function recordOrderCreated(db, order, lines) {
+  const day = dayKey(order.createdAt);
+
+  await bumpOrderStat(db, day, order.status, 1, order.total);
+
+  await db.dailyCustomerStat.upsert({
+    where: { day_customerEmail: { day, customerEmail: order.customerEmail } },
+    create: { day, customerEmail: order.customerEmail, orders: 1 },
+    update: { orders: { increment: 1 } },
+  });
+
+  await db.customerFirstOrder.upsert({
+    where: { customerEmail: order.customerEmail },
+    create: { customerEmail: order.customerEmail, day },
+    update: {},
+  });
+
+  const byCategory = new Map();
+  const byProduct = new Map();
+  for (const line of lines) {
+    const cat = byCategory.get(line.categorySlug) ?? { units: 0, revenue: 0 };
+    cat.units += line.quantity;
+    cat.revenue += line.lineTotal;
+    byCategory.set(line.categorySlug, cat);
+
+    const prod = byProduct.get(line.productId) ?? { units: 0, revenue: 0 };
+    prod.units += line.quantity;
+    prod.revenue += line.lineTotal;
+    byProduct.set(line.productId, prod);
+  }
+
+  for (const [categorySlug, { units, revenue }] of byCategory) {
+    // eslint-disable-next-line no-await-in-loop
+    await db.dailyCategoryStat.upsert({
+      where: { day_categorySlug: { day, categorySlug } },
+      create: { day, categorySlug, units, revenue },
+      update: { units: { increment: units }, revenue: { increment: revenue } },
+    });
+  }
+
+  for (const [productId, { units, revenue }] of byProduct) {
+    // eslint-disable-next-line no-await-in-loop
+    await db.dailyProductStat.upsert({
+      where: { day_productId: { day, productId } },
+      create: { day, productId, units, revenue },
+      update: { units: { increment: units }, revenue: { increment: revenue } },
+    });
+  }
+}
+
+// Moves an order between status buckets on its creation day.
+export async function recordStatusChange(db, order, fromStatus, toStatus) {
+  if (fromStatus === toStatus) return;
+  const day = dayKey(order.createdAt);
+  await bumpOrderStat(db, day, fromStatus, -1, -order.total);
+  await bumpOrderStat(db, day, toStatus, 1, order.total);
+}
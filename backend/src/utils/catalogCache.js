@@ -0,0 +1,84 @@
+import crypto from 'node:crypto';
+import { prisma } from '../prisma.js';
+
+// Catalog version: the CatalogVersion row, which database triggers bump on
+// every catalog write, so writes from other API processes, the seed script
+// or manual edits all invalidate it. Each process re-reads it at most every
+// CATALOG_VERSION_TTL_MS; its own writes call bumpCatalogVersion() to see
+// the new version on the next request.
+const VERSION_TTL_MS = Number(process.env.CATALOG_VERSION_TTL_MS ?? 1000);
+let current = null; // { version, expiresAt }
+let pending = null;
+let generation = 0;
+
+export function getCatalogVersion() {
+  if (current && current.expiresAt > Date.now()) return current.version;
+  if (!pending) {
+    const started = generation;
+    pending = prisma.catalogVersion
+      .findUnique({ where: { id: 1 } })
+      .then((row) => {
+        const version = String(row?.version ?? 0);
+        // A read that raced a local write may have missed it; don't cache it.
+        if (started === generation) current = { version, expiresAt: Date.now() + VERSION_TTL_MS };
+        return version;
+      })
+      .finally(() => {
+        if (started === generation) pending = null;
+      });
+  }
+  return pending;
+}
+
+export function bumpCatalogVersion() {
+  generation += 1;
+  current = null;
+  pending = null;
+  responseCache.clear();
+}
+
+// Small LRU of serialized responses, relying on Map insertion order.
+class LruCache {
+  constructor(maxEntries) {
+    this.maxEntries = maxEntries;
+    this.map = new Map();
+  }
+
+  get(key) {
+    const entry = this.map.get(key);
+    if (entry === undefined) return undefined;
+    this.map.delete(key);
+    this.map.set(key, entry);
+    return entry;
+  }
+
+  set(key, entry) {
+    this.map.delete(key);
+    this.map.set(key, entry);
+    if (this.map.size > this.maxEntries) {
+      this.map.delete(this.map.keys().next().value);
+    }
+  }
+
+  clear() {
+    this.map.clear();
+  }
+}
+
+export const responseCache = new LruCache(Number(process.env.CATALOG_CACHE_MAX_ENTRIES ?? 500));
+
+// Path plus query with keys sorted and empty values dropped, so equivalent
+// requests share one cache entry and one ETag.
+export function normalizedRequestKey(req) {
+  const params = Object.entries(req.query)
+    .filter(([, v]) => v !== undefined && v !== '')
+    .map(([k, v]) => [k, Array.isArray(v) ? v.join(',') : String(v)])
+    .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+  const qs = new URLSearchParams(params).toString();
+  return `${req.baseUrl}${req.path}${qs ? `?${qs}` : ''}`;
+}
+
+export function catalogEtag(key, catalogVersion) {
+  const digest = crypto.createHash('sha1').update(key).digest('base64url').slice(0, 16);
+  return `"${catalogVersion}-${digest}"`;
+}
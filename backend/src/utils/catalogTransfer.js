@@ -0,0 +1,132 @@
+import readline from 'node:readline';
+
+// Column layout shared by CSV import and export. List columns hold
+// `|`-separated values.
+export const CSV_COLUMNS = [
+  'id',
+  'name',
+  'categorySlug',
+  'price',
+  'originalPrice',
+  'image',
+  'images',
+  'sale',
+  'discount',
+  'colors',
+  'sizes',
+  'fabric',
+  'description',
+];
+const LIST_COLUMNS = new Set(['images', 'colors', 'sizes']);
+const BOOLEAN_COLUMNS = new Set(['sale']);
+
+// Yields { line, value } per non-blank line, or { line, error } when a line
+// isn't valid JSON. Pulling from the generator is what reads the stream, so a
+// slow consumer applies backpressure to the upload.
+export async function* readNdjsonRows(stream) {
+  const lines = readline.createInterface({ input: stream, crlfDelay: Infinity });
+  let line = 0;
+  for await (const text of lines) {
+    line += 1;
+    if (!text.trim()) continue;
+    try {
+      yield { line, value: JSON.parse(text) };
+    } catch {
+      yield { line, error: 'Invalid JSON' };
+    }
+  }
+}
+
+// RFC 4180 records (quoted fields may contain commas, quotes and newlines).
+// Yields arrays of field strings with the line number each record started on.
+async function* readCsvRecords(stream) {
+  let field = '';
+  let record = [];
+  let quoted = false;
+  let pendingQuote = false;
+  let line = 1;
+  let start = 1;
+
+  stream.setEncoding('utf8');
+  for await (const chunk of stream) {
+    for (const ch of chunk) {
+      if (quoted) {
+        if (pendingQuote) {
+          pendingQuote = false;
+          if (ch === '"') {
+            field += '"';
+            continue;
+          }
+          quoted = false;
+        } else if (ch === '"') {
+          pendingQuote = true;
+          continue;
+        } else {
+          if (ch === '\n') line += 1;
+          field += ch;
+          continue;
+        }
+      }
+      if (ch === '"' && field === '') {
+        quoted = true;
+      } else if (ch === ',') {
+        record.push(field);
+        field = '';
+      } else if (ch === '\n') {
+        record.push(field.endsWith('\r') ? field.slice(0, -1) : field);
+        yield { line: start, fields: record };
+        field = '';
+        record = [];
+        line += 1;
+        start = line;
+      } else {
+        field += ch;
+      }
+    }
+  }
+  if (field !== '' || record.length) {
+    record.push(field);
+    yield { line: start, fields: record };
+  }
+}
+
+function csvValue(column, raw) {
+  const text = raw.trim();
+  if (text === '') return undefined;
+  if (LIST_COLUMNS.has(column)) return text.split('|').map((s) => s.trim()).filter(Boolean);
+  if (BOOLEAN_COLUMNS.has(column)) return ['true', '1', 'yes'].includes(text.toLowerCase());
+  return text;
+}
+
+// Same shape as readNdjsonRows; the header row names the columns.
+export async function* readCsvRows(stream) {
+  let header;
+  for await (const { line, fields } of readCsvRecords(stream)) {
+    if (fields.length === 1 && fields[0].trim() === '') continue;
+    if (!header) {
+      header = fields.map((f) => f.trim().replace(/^\uFEFF/, ''));
+      const unknown = header.filter((c) => !CSV_COLUMNS.includes(c));
+      if (unknown.length) {
+        yield { line, error: `Unknown columns: ${unknown.join(', ')}` };
+        return;
+      }
+      continue;
+    }
+    const value = {};
+    header.forEach((column, i) => {
+      const v = csvValue(column, fields[i] ?? '');
+      if (v !== undefined) value[column] = v;
+    });
+    yield { line, value };
+  }
+}
+
+function csvEscape(value) {
+  if (value === null || value === undefined) return '';
+  const text = Array.isArray(value) ? value.join('|') : String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+export function toCsvRow(values) {
+  return `${values.map(csvEscape).join(',')}\n`;
+}
@@ -0,0 +1,118 @@
+import crypto from 'node:crypto';
+import fs from 'node:fs/promises';
+import os from 'node:os';
+import path from 'node:path';
+
+// Widths we are willing to render; anything else is rejected so the disk
+// cache can't be filled with arbitrary sizes.
+export const THUMBNAIL_WIDTHS = [160, 320, 640, 960];
+
+const CACHE_DIR = path.resolve(process.env.IMAGE_CACHE_DIR ?? '.cache/images');
+const WORKERS = Math.max(1, Number(process.env.IMAGE_WORKERS ?? Math.floor(os.availableParallelism() / 2)));
+const MAX_SOURCE_BYTES = Number(process.env.IMAGE_MAX_SOURCE_BYTES ?? 15 * 1024 * 1024);
+const PUBLIC_API_URL = (process.env.PUBLIC_API_URL ?? `http://localhost:${process.env.PORT ?? 4000}/api`).replace(/\/$/, '');
+
+// sharp is an optional dependency: without it thumbnails fall back to the
+// original image (see routes/images.js).
+let sharpPromise;
+export function loadSharp() {
+  sharpPromise ??= import('sharp')
+    .then((mod) => {
+      const sharp = mod.default;
+      sharp.concurrency(1); // parallelism comes from WORKERS, one libvips thread each
+      return sharp;
+    })
+    .catch((e) => {
+      // eslint-disable-next-line no-console
+      console.warn(`sharp unavailable (${e.code ?? e.message}); thumbnail URLs will redirect to original images`);
+      return null;
+    });
+  return sharpPromise;
+}
+
+export function sourceHash(src) {
+  return crypto.createHash('sha256').update(src).digest('hex').slice(0, 16);
+}
+
+// URLs embed a hash of the source image, so they change whenever the image
+// does and the responses can be cached forever.
+export function thumbnailUrls(productId, src) {
+  if (!src) return {};
+  const v = sourceHash(src);
+  return Object.fromEntries(
+    THUMBNAIL_WIDTHS.map((w) => [w, `${PUBLIC_API_URL}/images/products/${productId}/${w}?v=${v}`])
+  );
+}
+
+export function cachePath(hash, width, format) {
+  return path.join(CACHE_DIR, hash.slice(0, 2), `${hash}-${width}.${format}`);
+}
+
+export async function readCached(file) {
+  try {
+    return await fs.readFile(file);
+  } catch {
+    return null;
+  }
+}
+
+// Bounded pool: at most WORKERS resizes run at once, the rest queue.
+let active = 0;
+const queue = [];
+
+function withWorker(task) {
+  return new Promise((resolve, reject) => {
+    const run = () => {
+      active += 1;
+      task()
+        .then(resolve, reject)
+        .finally(() => {
+          active -= 1;
+          queue.shift()?.();
+        });
+    };
+    if (active < WORKERS) run();
+    else queue.push(run);
+  });
+}
+
+async function fetchSource(src) {
+  const res = await fetch(src, { signal: AbortSignal.timeout(10_000) });
+  if (!res.ok) throw new Error(`Source image responded ${res.status}`);
+  const declared = Number(res.headers.get('content-length') ?? 0);
+  if (declared > MAX_SOURCE_BYTES) throw new Error('Source image too large');
+  const buf = Buffer.from(await res.arrayBuffer());
+  if (buf.length > MAX_SOURCE_BYTES) throw new Error('Source image too large');
+  return buf;
+}
+
+async function render(sharp, src, width, format) {
+  const input = await fetchSource(src);
+  const pipeline = sharp(input, { failOn: 'none' }).rotate().resize({ width, withoutEnlargement: true });
+  return format === 'webp'
+    ? pipeline.webp({ quality: 75 }).toBuffer()
+    : pipeline.flatten({ background: '#ffffff' }).jpeg({ quality: 78, mozjpeg: true }).toBuffer();
+}
+
+// Concurrent requests for the same derivative share one render.
+const inFlight = new Map();
+
+export function getDerivative(sharp, src, width, format) {
+  const file = cachePath(sourceHash(src), width, format);
+  const existing = inFlight.get(file);
+  if (existing) return existing;
+
+  const job = (async () => {
+    const cached = await readCached(file);
+    if (cached) return cached;
+    const body = await withWorker(() => render(sharp, src, width, format));
+    await fs.mkdir(path.dirname(file), { recursive: true });
+    const tmp = `${file}.${process.pid}.${Date.now()}.tmp`;
+    await fs.writeFile(tmp, body);
+    await fs.rename(tmp, file);
+    return body;
+  })().finally(() => inFlight.delete(file));
+
+  inFlight.set(file, job);
+  return job;
+}
@@ -1,7 +1,50 @@
-export function generateOrderNumber() {
-  // Matches the frontend style: JJ########
-  const digits = Math.floor(Math.random() * 1e8)
-    .toString()
-    .padStart(8, '0');
+import { prisma } from '../prisma.js';
+
+// Order numbers keep the frontend's JJ######## format but come from a
+// database sequence instead of random draws, so they never collide and need
+// no existence checks.
+//
+// Each process reserves ORDER_NUMBER_BLOCK_SIZE sequence values at a time with
+// one UPDATE and hands them out from memory; blocks from different processes
+// never overlap. Sequence values are spread over the 8-digit space by an
+// affine permutation (the multiplier is coprime with 10^8), so consecutive
+// orders don't get guessable consecutive numbers.
+
+const SPACE = 100_000_000;
+const MULTIPLIER = 73_939_133;
+const OFFSET = 19_260_817;
+const BLOCK_SIZE = Number(process.env.ORDER_NUMBER_BLOCK_SIZE ?? 100);
+
+let nextSeq = 0;
+let blockEnd = 0;
+let refill = null;
+
+export function formatOrderNumber(seq) {
+  // seq * MULTIPLIER stays below 2^53 for every seq < SPACE.
+  const digits = ((seq * MULTIPLIER + OFFSET) % SPACE).toString().padStart(8, '0');
   return `JJ${digits}`;
 }
+
+function reserveBlock() {
+  refill ??= prisma.sequence
+    .update({ where: { name: 'order' }, data: { next: { increment: BLOCK_SIZE } } })
+    .then((row) => {
+      nextSeq = row.next - BLOCK_SIZE;
+      blockEnd = row.next;
+    })
+    .finally(() => {
+      refill = null;
+    });
+  return refill;
+}
+
+export async function nextOrderNumber() {
+  while (nextSeq >= blockEnd) {
+    // eslint-disable-next-line no-await-in-loop
+    await reserveBlock();
+  }
+  if (nextSeq >= SPACE) throw new Error('Order number space exhausted');
+  const seq = nextSeq;
+  nextSeq += 1;
+  return formatOrderNumber(seq);
+}
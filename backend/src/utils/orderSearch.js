@@ -0,0 +1,62 @@
+import { Prisma } from '@prisma/client';
+import { prisma } from '../prisma.js';
+
+// Support order listing helpers: full-text search over the OrderSearch FTS5
+// index (see the order_listing migration) and cached counts.
+
+function searchFrom({ match, status }) {
+  const conditions = [Prisma.sql`"OrderSearch" MATCH ${match}`];
+  if (status) conditions.push(Prisma.sql`o."status" = ${status}`);
+  return { conditions, from: Prisma.sql`FROM "OrderSearch" JOIN "Order" o ON o."id" = "OrderSearch"."orderId"` };
+}
+
+// One page of matching order ids, newest first, strictly after the order
+// `cursor` (an order id) in (createdAt, id) order. Comparing against the
+// cursor row itself keeps the keyset condition on the index.
+export async function searchOrderIds({ match, status, cursor, take }) {
+  const { conditions, from } = searchFrom({ match, status });
+  if (cursor) {
+    conditions.push(
+      Prisma.sql`(o."createdAt", o."id") < (SELECT c."createdAt", c."id" FROM "Order" c WHERE c."id" = ${cursor})`
+    );
+  }
+  const rows = await prisma.$queryRaw`
+    SELECT o."id" AS "id" ${from}
+    WHERE ${Prisma.join(conditions, ' AND ')}
+    ORDER BY o."createdAt" DESC, o."id" DESC
+    LIMIT ${take}
+  `;
+  return rows.map((r) => r.id);
+}
+
+export async function countSearchOrders({ match, status }) {
+  const { conditions, from } = searchFrom({ match, status });
+  const rows = await prisma.$queryRaw`SELECT COUNT(*) AS "total" ${from} WHERE ${Prisma.join(conditions, ' AND ')}`;
+  return Number(rows[0]?.total ?? 0);
+}
+
+// Listing totals are cached per (status, search) until an order write calls
+// invalidateOrderCounts(), and for at most ORDER_COUNT_TTL_MS so writes made
+// by other processes show up too.
+const COUNT_TTL_MS = Number(process.env.ORDER_COUNT_TTL_MS ?? 30_000);
+const MAX_ENTRIES = 500;
+const counts = new Map();
+
+// Entries hold the count promise, so concurrent misses share one COUNT.
+export function cachedOrderCount(key, compute) {
+  const hit = counts.get(key);
+  if (hit && Date.now() - hit.at < COUNT_TTL_MS) return hit.total;
+
+  const entry = { at: Date.now(), total: compute() };
+  counts.delete(key);
+  counts.set(key, entry);
+  if (counts.size > MAX_ENTRIES) counts.delete(counts.keys().next().value);
+  entry.total.catch(() => {
+    if (counts.get(key) === entry) counts.delete(key);
+  });
+  return entry.total;
+}
+
+export function invalidateOrderCounts() {
+  counts.clear();
+}
@@ -0,0 +1,51 @@
+import { Prisma } from '@prisma/client';
+import { prisma } from '../prisma.js';
+
+// Turns free text into an FTS5 query: every word must match, and each word
+// also matches as a prefix ("kur" finds "kurta"). Quoting each term keeps
+// user input from being parsed as FTS5 syntax.
+export function toMatchQuery(text) {
+  const terms = (text ?? '').toLowerCase().match(/[\p{L}\p{N}]+/gu) ?? [];
+  if (!terms.length) return null;
+  return terms.map((t) => `"${t}"*`).join(' ');
+}
+
+function orderSql(sort) {
+  if (sort === 'price_asc') return Prisma.sql`p."price" ASC, p."id" ASC`;
+  if (sort === 'price_desc') return Prisma.sql`p."price" DESC, p."id" DESC`;
+  if (sort === 'latest') return Prisma.sql`p."createdAt" DESC, p."id" DESC`;
+  // "rank" is BM25 with the column weights configured in the migration.
+  return Prisma.sql`"ProductSearch"."rank", p."id" ASC`;
+}
+
+// Runs a ranked full-text search against the ProductSearch FTS5 index with the
+// same filters as the regular listing. Returns the matching page of ids in
+// order plus the total number of matches.
+export async function searchProductIds({ match, category, minPrice, maxPrice, colors = [], sizes = [], sort, skip, take }) {
+  const conditions = [Prisma.sql`"ProductSearch" MATCH ${match}`];
+  if (category) conditions.push(Prisma.sql`p."categorySlug" = ${category}`);
+  if (minPrice != null) conditions.push(Prisma.sql`p."price" >= ${minPrice}`);
+  if (maxPrice != null) conditions.push(Prisma.sql`p."price" <= ${maxPrice}`);
+  if (colors.length) {
+    conditions.push(Prisma.sql`EXISTS (SELECT 1 FROM "ProductColor" c WHERE c."productId" = p."id" AND c."value" IN (${Prisma.join(colors)}))`);
+  }
+  if (sizes.length) {
+    conditions.push(Prisma.sql`EXISTS (SELECT 1 FROM "ProductSize" s WHERE s."productId" = p."id" AND s."value" IN (${Prisma.join(sizes)}))`);
+  }
+
+  const from = Prisma.sql`
+    FROM "ProductSearch"
+    JOIN "Product" p ON p."id" = "ProductSearch"."rowid"
+    WHERE ${Prisma.join(conditions, ' AND ')}
+  `;
+
+  const [countRows, idRows] = await prisma.$transaction([
+    prisma.$queryRaw`SELECT COUNT(*) AS "total" ${from}`,
+    prisma.$queryRaw`SELECT p."id" AS "id" ${from} ORDER BY ${orderSql(sort)} LIMIT ${take} OFFSET ${skip}`,
+  ]);
+
+  return {
+    total: Number(countRows[0]?.total ?? 0),
+    ids: idRows.map((r) => Number(r.id)),
+  };
+}
@@ -0,0 +1,203 @@
+import { Prisma } from '@prisma/client';
+import { prisma } from '../prisma.js';
+
+// express-rate-limit (v7) store shared by every API process on the host,
+// backed by the RateLimitHit table in the SQLite database (WAL mode).
+//
+// - Sliding window: hits are counted in fixed buckets of windowMs and the
+//   current total is prev * (1 - elapsed fraction) + current.
+// - increment() never waits on the database: it bumps an in-memory pending
+//   counter and answers from the last synced totals plus local hits.
+// - Every RATE_LIMIT_FLUSH_MS, pending hits are written with one multi-row
+//   upsert per store and the fresh totals (all processes) are read back, so
+//   each process sees the others' traffic with at most that much lag.
+// - Rows expire two windows after their bucket; expired rows are deleted
+//   every RATE_LIMIT_COMPACT_MS. Only keys this process saw a hit for in the
+//   current or previous bucket are kept in memory and refreshed, so idle
+//   keys cost nothing once their window has passed.
+
+const FLUSH_MS = Number(process.env.RATE_LIMIT_FLUSH_MS ?? 200);
+const COMPACT_MS = Number(process.env.RATE_LIMIT_COMPACT_MS ?? 60_000);
+const SQL_CHUNK = 400;
+
+function chunks(list, size) {
+  const out = [];
+  for (let i = 0; i < list.length; i += size) out.push(list.slice(i, i + size));
+  return out;
+}
+
+const stores = new Set();
+let flushTimer = null;
+let compactTimer = null;
+
+function startTimers() {
+  if (flushTimer) return;
+  flushTimer = setInterval(() => {
+    for (const store of stores) store.flush();
+  }, FLUSH_MS);
+  flushTimer.unref();
+  compactTimer = setInterval(() => {
+    prisma.$executeRaw`DELETE FROM "RateLimitHit" WHERE "expiresAt" < ${BigInt(Date.now())}`.catch((e) => {
+      // eslint-disable-next-line no-console
+      console.warn('Rate limit compaction failed:', e.message);
+    });
+  }, COMPACT_MS);
+  compactTimer.unref();
+}
+
+export class SharedWindowStore {
+  constructor({ prefix }) {
+    this.prefix = prefix;
+    this.localKeys = false;
+    this.windowMs = 60_000;
+    this.synced = new Map(); // key -> { bucket, current, prev }
+    this.lastHit = new Map(); // key -> bucket of this process's latest hit
+    this.pending = new Map(); // `${key}\0${bucket}` -> { key, bucket, n }
+    this.inflight = new Map(); // same shape; being flushed right now
+    this.flushing = false;
+  }
+
+  init(options) {
+    this.windowMs = options.windowMs;
+    stores.add(this);
+    startTimers();
+  }
+
+  bucketOf(now) {
+    return Math.floor(now / this.windowMs) * this.windowMs;
+  }
+
+  unsynced(key, bucket) {
+    const id = `${key}\u0000${bucket}`;
+    return (this.pending.get(id)?.n ?? 0) + (this.inflight.get(id)?.n ?? 0);
+  }
+
+  estimate(key, now) {
+    const bucket = this.bucketOf(now);
+    const s = this.synced.get(key);
+    let current = 0;
+    let prev = 0;
+    if (s?.bucket === bucket) {
+      current = s.current;
+      prev = s.prev;
+    } else if (s?.bucket === bucket - this.windowMs) {
+      prev = s.current;
+    }
+    current += this.unsynced(key, bucket);
+    prev += this.unsynced(key, bucket - this.windowMs);
+    const elapsed = (now - bucket) / this.windowMs;
+    return {
+      totalHits: Math.max(0, Math.ceil(prev * (1 - elapsed) + current)),
+      resetTime: new Date(bucket + this.windowMs),
+    };
+  }
+
+  add(key, n) {
+    const bucket = this.bucketOf(Date.now());
+    const id = `${key}\u0000${bucket}`;
+    this.lastHit.set(key, bucket);
+    const entry = this.pending.get(id);
+    if (entry) entry.n += n;
+    else this.pending.set(id, { key, bucket, n });
+  }
+
+  increment(key) {
+    this.add(key, 1);
+    return this.estimate(key, Date.now());
+  }
+
+  decrement(key) {
+    this.add(key, -1);
+  }
+
+  get(key) {
+    return this.estimate(key, Date.now());
+  }
+
+  async resetKey(key) {
+    this.synced.delete(key);
+    this.lastHit.delete(key);
+    for (const [id, entry] of this.pending) if (entry.key === key) this.pending.delete(id);
+    await prisma.$executeRaw`DELETE FROM "RateLimitHit" WHERE "key" = ${this.prefix + key}`;
+  }
+
+  async resetAll() {
+    this.synced.clear();
+    this.lastHit.clear();
+    this.pending.clear();
+    await prisma.$executeRaw`DELETE FROM "RateLimitHit" WHERE "key" LIKE ${`${this.prefix}%`}`;
+  }
+
+  shutdown() {
+    stores.delete(this);
+    return this.flush();
+  }
+
+  async flush() {
+    if (this.flushing) return;
+    this.flushing = true;
+    const now = Date.now();
+    const bucket = this.bucketOf(now);
+    this.inflight = this.pending;
+    this.pending = new Map();
+    let written = false;
+    try {
+      const writes = [...this.inflight.values()].filter((e) => e.n !== 0);
+      if (writes.length) {
+        await prisma.$transaction(
+          chunks(writes, SQL_CHUNK).map((part) => {
+            const rows = part.map(
+              (e) => Prisma.sql`(${this.prefix + e.key}, ${BigInt(e.bucket)}, ${e.n}, ${BigInt(e.bucket + 2 * this.windowMs)})`
+            );
+            return prisma.$executeRaw`
+              INSERT INTO "RateLimitHit" ("key", "bucket", "count", "expiresAt")
+              VALUES ${Prisma.join(rows)}
+              ON CONFLICT ("key", "bucket") DO UPDATE SET "count" = "count" + excluded."count"
+            `;
+          })
+        );
+      }
+      written = true;
+
+      // Forget keys with no local hit in the current or previous bucket (their
+      // window has passed), then refresh totals for the rest.
+      for (const [key, last] of this.lastHit) {
+        if (last < bucket - this.windowMs) {
+          this.lastHit.delete(key);
+          this.synced.delete(key);
+        }
+      }
+      const keys = [...this.lastHit.keys()];
+      const fresh = new Map();
+      for (const part of chunks(keys, SQL_CHUNK)) {
+        // eslint-disable-next-line no-await-in-loop
+        const rows = await prisma.$queryRaw`
+          SELECT "key", "bucket", "count" FROM "RateLimitHit"
+          WHERE "key" IN (${Prisma.join(part.map((k) => this.prefix + k))})
+            AND "bucket" >= ${BigInt(bucket - this.windowMs)}
+        `;
+        for (const row of rows) {
+          const key = row.key.slice(this.prefix.length);
+          const s = fresh.get(key) ?? { bucket, current: 0, prev: 0 };
+          if (Number(row.bucket) === bucket) s.current = Number(row.count);
+          else if (Number(row.bucket) === bucket - this.windowMs) s.prev = Number(row.count);
+          fresh.set(key, s);
+        }
+      }
+      for (const key of keys) this.synced.set(key, fresh.get(key) ?? { bucket, current: 0, prev: 0 });
+    } catch (e) {
+      // Keep unwritten hits for the next flush rather than losing them.
+      for (const [id, entry] of written ? [] : this.inflight) {
+        const current = this.pending.get(id);
+        if (current) current.n += entry.n;
+        else this.pending.set(id, entry);
+      }
+      // eslint-disable-next-line no-console
+      console.warn('Rate limit flush failed:', e.message);
+    } finally {
+      // Written hits are counted through the synced totals from here on.
+      this.inflight = new Map();
+      this.flushing = false;
+    }
+  }
+}
@@ -0,0 +1,179 @@
+import { prisma } from '../prisma.js';
+import * as warehouse from '../integrations/warehouse.js';
+
+// Durable queue of warehouse/WMS calls (the WarehouseOutbox table).
+//
+// Routes call enqueueWarehouseCall() with their transaction client, so the
+// call is recorded atomically with the order change and survives restarts and
+// WMS outages, then kickWarehouseDispatcher() once committed. A single
+// in-process dispatcher then:
+//   - claims due rows in batches (pushing nextAttemptAt forward as a lease, so
+//     a crash mid-delivery just makes them due again),
+//   - collapses rows per (orderNumber, kind): only the newest address/status
+//     is delivered, older pending rows are marked SUPERSEDED,
+//   - sends the batch through warehouse.sendBatch(),
+//   - retries failures with exponential backoff and gives up after
+//     WAREHOUSE_OUTBOX_MAX_ATTEMPTS (status FAILED).
+
+const BATCH_SIZE = Number(process.env.WAREHOUSE_OUTBOX_BATCH_SIZE ?? 50);
+const POLL_MS = Number(process.env.WAREHOUSE_OUTBOX_POLL_MS ?? 1000);
+const MAX_ATTEMPTS = Number(process.env.WAREHOUSE_OUTBOX_MAX_ATTEMPTS ?? 10);
+const BASE_BACKOFF_MS = 2000;
+const MAX_BACKOFF_MS = 10 * 60 * 1000;
+const LEASE_MS = 60 * 1000;
+
+export async function enqueueWarehouseCall(db, orderNumber, kind, payload) {
+  return db.warehouseOutbox.create({
+    data: { orderNumber, kind, payloadJson: JSON.stringify(payload) },
+  });
+}
+
+// Call after the enqueueing transaction commits to deliver without waiting
+// for the next poll.
+export function kickWarehouseDispatcher() {
+  setImmediate(kick);
+}
+
+export function outboxStatus(row) {
+  return {
+    id: row.id,
+    kind: row.kind,
+    status: row.status,
+    attempts: row.attempts,
+    nextAttemptAt: row.nextAttemptAt,
+    lastError: row.lastError,
+    result: row.resultJson ? JSON.parse(row.resultJson) : null,
+    sentAt: row.sentAt,
+  };
+}
+
+function backoffMs(attempts) {
+  const delay = Math.min(MAX_BACKOFF_MS, BASE_BACKOFF_MS * 2 ** (attempts - 1));
+  return delay / 2 + Math.random() * (delay / 2);
+}
+
+// Rows are read outside the transaction and claimed with guarded updates, so
+// the transaction's first statement is a write: SQLite transactions start
+// deferred, and one that reads first fails with SQLITE_BUSY instead of
+// waiting when checkouts hold the write lock. A row another dispatcher
+// claimed or that changed since the read no longer matches its guard and is
+// left out of the batch.
+async function claimBatch() {
+  const now = new Date();
+  const due = await prisma.warehouseOutbox.findMany({
+    where: { status: 'PENDING', nextAttemptAt: { lte: now } },
+    orderBy: { id: 'asc' },
+    take: BATCH_SIZE,
+  });
+  if (!due.length) return [];
+
+  // Newest pending row per (orderNumber, kind), whether due or backing off.
+  const pending = await prisma.warehouseOutbox.findMany({
+    where: { status: 'PENDING', orderNumber: { in: [...new Set(due.map((r) => r.orderNumber))] } },
+    select: { id: true, orderNumber: true, kind: true },
+  });
+  const newest = new Map();
+  for (const row of pending) {
+    const key = `${row.orderNumber}\u0000${row.kind}`;
+    if (!newest.has(key) || newest.get(key).id < row.id) newest.set(key, row);
+  }
+  const keepIds = new Set([...newest.values()].map((r) => r.id));
+  const supersededIds = pending.filter((r) => !keepIds.has(r.id)).map((r) => r.id);
+  const candidates = due.filter((r) => keepIds.has(r.id));
+  const leaseUntil = new Date(now.getTime() + LEASE_MS);
+
+  return prisma.$transaction(async (tx) => {
+    if (supersededIds.length) {
+      await tx.warehouseOutbox.updateMany({
+        where: { id: { in: supersededIds }, status: 'PENDING' },
+        data: { status: 'SUPERSEDED' },
+      });
+    }
+    const batch = [];
+    for (const row of candidates) {
+      // eslint-disable-next-line no-await-in-loop
+      const { count } = await tx.warehouseOutbox.updateMany({
+        where: { id: row.id, status: 'PENDING', nextAttemptAt: row.nextAttemptAt },
+        data: { nextAttemptAt: leaseUntil },
+      });
+      if (count) batch.push(row);
+    }
+    return batch;
+  });
+}
+
+async function deliver(batch) {
+  let results;
+  try {
+    results = await warehouse.sendBatch(
+      batch.map((r) => ({ id: r.id, kind: r.kind, orderNumber: r.orderNumber, payload: JSON.parse(r.payloadJson) }))
+    );
+  } catch (e) {
+    results = batch.map((r) => ({ id: r.id, success: false, error: e.message }));
+  }
+  const byId = new Map(results.map((r) => [r.id, r]));
+
+  await prisma.$transaction(
+    batch.map((row) => {
+      const result = byId.get(row.id) ?? { success: false, error: 'No result from warehouse' };
+      if (result.success) {
+        return prisma.warehouseOutbox.update({
+          where: { id: row.id },
+          data: {
+            status: 'SENT',
+            attempts: { increment: 1 },
+            sentAt: new Date(),
+            lastError: null,
+            resultJson: JSON.stringify(result.result ?? null),
+          },
+        });
+      }
+      const attempts = row.attempts + 1;
+      return prisma.warehouseOutbox.update({
+        where: { id: row.id },
+        data: {
+          status: attempts >= MAX_ATTEMPTS ? 'FAILED' : 'PENDING',
+          attempts,
+          lastError: String(result.error ?? 'Warehouse call failed').slice(0, 500),
+          nextAttemptAt: new Date(Date.now() + backoffMs(attempts)),
+        },
+      });
+    })
+  );
+}
+
+let running = false;
+let rerun = false;
+
+// Drain everything that is due; concurrent kicks coalesce into one more pass.
+async function kick() {
+  if (running) {
+    rerun = true;
+    return;
+  }
+  running = true;
+  try {
+    do {
+      rerun = false;
+      for (;;) {
+        const batch = await claimBatch();
+        if (!batch.length) break;
+        await deliver(batch);
+      }
+    } while (rerun);
+  } catch (e) {
+    // eslint-disable-next-line no-console
+    console.error('Warehouse outbox dispatch failed:', e);
+  } finally {
+    running = false;
+  }
+}
+
+let timer = null;
+
+export function startWarehouseDispatcher() {
+  if (timer) return;
+  timer = setInterval(kick, POLL_MS);
+  timer.unref();
+  kick();
+}
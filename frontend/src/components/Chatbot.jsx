@@ -3,6 +3,7 @@ import { Send, Sparkles, MessageCircle, X, Upload, Camera, Image, ShoppingBag }
 import { useApp } from "../context/AppContext";
 import ProductCard from "./ProductCard";
 import OrderCard from "./OrderCard";
+import { CHAT_ACCEPT, readChatPayload } from "../utils/chatWire";
 export default function Chatbot() {
   const [isOpen, setIsOpen] = useState(false);
   const [activeTab, setActiveTab] = useState("chat");
@@ -33,6 +34,7 @@ export default function Chatbot() {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          Accept: CHAT_ACCEPT,
           ...(authToken ? { "Authorization": `Bearer ${authToken}` } : {}),
         },
         body: JSON.stringify({
@@ -40,7 +42,7 @@ export default function Chatbot() {
           authToken: authToken,
         }),
       });
-      const data = await res.json();
+      const data = await readChatPayload(res);
       const botResponses = data.responses || [];
       const formattedBotMessages = botResponses.map((r) => ({
         role: "bot",
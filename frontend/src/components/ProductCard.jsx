@@ -10,6 +10,11 @@ export default function ProductCard({ product }) {
     ? product.price 
     : product.originalPrice;
 
+  // Backend-resized variants (160/320/640/960 px wide), keyed by width
+  const thumbnailSrcSet = Object.entries(product.thumbnails ?? {})
+    .map(([width, url]) => `${url} ${width}w`)
+    .join(', ');
+
   const handleWishlistToggle = () => {
     if (inWishlist) {
       removeFromWishlist(product.id);
@@ -24,7 +29,11 @@ export default function ProductCard({ product }) {
       <div className="relative overflow-hidden bg-gradient-to-br from-gray-100 to-gray-200 h-72 group">
         <Link to={`/product/${product.id}`}>
           <img
-            src={product.image}
+            src={product.thumbnails?.['640'] ?? product.image}
+            srcSet={thumbnailSrcSet || undefined}
+            sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+            loading="lazy"
+            decoding="async"
             alt={product.name}
             className="w-full h-full object-cover group-hover:scale-125 transition-transform duration-500"
           />
@@ -16,20 +16,21 @@ import fetchApi, { buildApiUrl } from '../../utils/apiClient';
 const formatCurrency = (value) =>
   typeof value === 'number' ? `Rs. ${value.toLocaleString('en-PK')}` : 'Rs. 0';
 
-const toDate = (value) => (value ? new Date(value) : null);
+// Daily rollup points are UTC calendar days ("YYYY-MM-DD").
+const dayToDate = (day) => new Date(`${day}T00:00:00`);
 
-const buildMonthlyRevenueSeries = (orders, months = 6) => {
-  if (!orders.length) return [];
+const buildMonthlyRevenueSeries = (daily, months = 6) => {
+  if (!daily.length) return [];
   const now = new Date();
   const series = [];
 
   for (let i = months - 1; i >= 0; i -= 1) {
     const start = new Date(now.getFullYear(), now.getMonth() - i, 1);
     const end = new Date(now.getFullYear(), now.getMonth() - i + 1, 0, 23, 59, 59, 999);
-    const total = orders.reduce((sum, order) => {
-      const createdAt = toDate(order.createdAt);
-      if (!createdAt || createdAt < start || createdAt > end) return sum;
-      return sum + (Number(order.total) || 0);
+    const total = daily.reduce((sum, point) => {
+      const date = dayToDate(point.day);
+      if (date < start || date > end) return sum;
+      return sum + (Number(point.revenue) || 0);
     }, 0);
     series.push({
       name: start.toLocaleDateString('en-US', { month: 'short' }),
@@ -43,9 +44,7 @@ const buildMonthlyRevenueSeries = (orders, months = 6) => {
 export default function AdminAnalytics() {
   const [status, setStatus] = useState('loading');
   const [error, setError] = useState('');
-  const [orders, setOrders] = useState([]);
-  const [products, setProducts] = useState([]);
-  const [categories, setCategories] = useState([]);
+  const [summary, setSummary] = useState(null);
 
   useEffect(() => {
     let isMounted = true;
@@ -54,35 +53,9 @@ export default function AdminAnalytics() {
       setStatus('loading');
       setError('');
       try {
-        const pageLimit = 50;
-        const maxPages = 4;
-        const fetchOrdersPaged = async () => {
-          const firstPage = await fetchApi(buildApiUrl('/support/orders', { page: 1, limit: pageLimit }));
-          const totalPages = Math.min(firstPage.totalPages ?? 1, maxPages);
-          const pages = [firstPage];
-
-          if (totalPages > 1) {
-            const rest = await Promise.all(
-              Array.from({ length: totalPages - 1 }, (_, index) =>
-                fetchApi(buildApiUrl('/support/orders', { page: index + 2, limit: pageLimit }))
-              )
-            );
-            pages.push(...rest);
-          }
-
-          return pages.flatMap((payload) => payload.orders ?? []);
-        };
-
-        const [ordersData, productsPayload, categoriesPayload] = await Promise.all([
-          fetchOrdersPaged(),
-          fetchApi('/products'),
-          fetchApi('/categories'),
-        ]);
-
+        const payload = await fetchApi(buildApiUrl('/analytics/summary', { days: 186, top: 5 }));
         if (!isMounted) return;
-        setOrders(ordersData);
-        setProducts(productsPayload.items ?? []);
-        setCategories(categoriesPayload.categories ?? []);
+        setSummary(payload);
         setStatus('success');
       } catch (err) {
         if (!isMounted) return;
@@ -97,58 +70,40 @@ export default function AdminAnalytics() {
     };
   }, []);
 
-  const totalRevenue = useMemo(
-    () => orders.reduce((sum, order) => sum + (Number(order.total) || 0), 0),
-    [orders]
-  );
-
-  const averageOrderValue = useMemo(() => {
-    if (!orders.length) return 0;
-    return totalRevenue / orders.length;
-  }, [orders.length, totalRevenue]);
-
-  const deliveredRate = useMemo(() => {
-    if (!orders.length) return 0;
-    const delivered = orders.filter((order) => order.status === 'DELIVERED').length;
-    return (delivered / orders.length) * 100;
-  }, [orders]);
-
-  const cancelledRate = useMemo(() => {
-    if (!orders.length) return 0;
-    const cancelled = orders.filter((order) => order.status === 'CANCELLED').length;
-    return (cancelled / orders.length) * 100;
-  }, [orders]);
+  const totalOrders = summary?.totals.orders ?? 0;
+  const totalRevenue = summary?.totals.revenue ?? 0;
+  const averageOrderValue = summary?.totals.averageOrderValue ?? 0;
+
+  const statusShare = useMemo(() => {
+    const rows = summary?.byStatus ?? [];
+    const total = rows.reduce((sum, row) => sum + row.orders, 0);
+    const share = (name) => {
+      if (!total) return 0;
+      const row = rows.find((r) => r.status === name);
+      return ((row?.orders ?? 0) / total) * 100;
+    };
+    return { delivered: share('DELIVERED'), cancelled: share('CANCELLED') };
+  }, [summary]);
+  const deliveredRate = statusShare.delivered;
+  const cancelledRate = statusShare.cancelled;
 
-  const revenueSeries = useMemo(() => buildMonthlyRevenueSeries(orders, 6), [orders]);
+  const revenueSeries = useMemo(() => buildMonthlyRevenueSeries(summary?.daily ?? [], 6), [summary]);
 
   const categoryBreakdown = useMemo(() => {
-    if (!products.length && !categories.length) return [];
-    const categoryMap = new Map();
-    categories.forEach((cat) => {
-      categoryMap.set(cat.slug, { name: cat.name, count: 0 });
-    });
-    products.forEach((product) => {
-      const slug = product.categorySlug || product.category || product.categoryId;
-      const key = slug ? String(slug) : 'uncategorized';
-      if (!categoryMap.has(key)) {
-        const label = key === 'uncategorized' ? 'Uncategorized' : key.charAt(0).toUpperCase() + key.slice(1);
-        categoryMap.set(key, { name: label, count: 0 });
-      }
-      const entry = categoryMap.get(key);
-      entry.count += 1;
-    });
-    const totalCount = Math.max(1, Array.from(categoryMap.values()).reduce((sum, item) => sum + item.count, 0));
+    const rows = summary?.categories ?? [];
+    if (!rows.length) return [];
+    const totalCount = Math.max(1, rows.reduce((sum, item) => sum + item.products, 0));
     const palette = ['#3b82f6', '#22c55e', '#8b5cf6', '#60a5fa', '#f59e0b', '#ef4444'];
-    return Array.from(categoryMap.values())
-      .sort((a, b) => b.count - a.count)
+    return [...rows]
+      .sort((a, b) => b.products - a.products)
       .slice(0, 4)
       .map((cat, index) => ({
         name: cat.name,
-        value: Math.round((cat.count / totalCount) * 100),
-        count: cat.count,
+        value: Math.round((cat.products / totalCount) * 100),
+        count: cat.products,
         color: palette[index % palette.length],
       }));
-  }, [categories, products]);
+  }, [summary]);
 
   const categoryGradient = useMemo(() => {
     if (!categoryBreakdown.length) return 'conic-gradient(#e2e8f0 0% 100%)';
@@ -165,30 +120,18 @@ export default function AdminAnalytics() {
     return `conic-gradient(${segments.join(', ')})`;
   }, [categoryBreakdown]);
 
-  const topProducts = useMemo(() => {
-    if (!orders.length) return [];
-    const productMap = new Map();
-    orders.forEach((order) => {
-      (order.items ?? []).forEach((item) => {
-        const name = item.product?.name || `Product #${item.productId}`;
-        const key = item.productId ?? name;
-        if (!productMap.has(key)) {
-          productMap.set(key, { name, sales: 0, revenue: 0 });
-        }
-        const entry = productMap.get(key);
-        const qty = Number(item.quantity) || 0;
-        const lineTotal = Number(item.lineTotal) || (Number(item.unitPrice) || 0) * qty;
-        entry.sales += qty;
-        entry.revenue += lineTotal;
-      });
-    });
-    return Array.from(productMap.values())
-      .sort((a, b) => b.revenue - a.revenue)
-      .slice(0, 5);
-  }, [orders]);
+  const topProducts = useMemo(
+    () =>
+      (summary?.topProducts ?? []).map((product) => ({
+        name: product.name,
+        sales: product.units,
+        revenue: product.revenue,
+      })),
+    [summary]
+  );
 
   const metrics = [
-    { label: 'Total Revenue', value: formatCurrency(totalRevenue), change: `${orders.length} orders`, trend: 'up', icon: TrendingUp },
+    { label: 'Total Revenue', value: formatCurrency(totalRevenue), change: `${totalOrders} orders`, trend: 'up', icon: TrendingUp },
     { label: 'Average Order Value', value: formatCurrency(averageOrderValue), change: 'Live', trend: 'up', icon: TrendingUp },
     { label: 'Delivered Rate', value: `${deliveredRate.toFixed(1)}%`, change: 'Delivered', trend: deliveredRate >= 50 ? 'up' : 'down', icon: deliveredRate >= 50 ? TrendingUp : TrendingDown },
     { label: 'Cancelled Rate', value: `${cancelledRate.toFixed(1)}%`, change: 'Cancelled', trend: cancelledRate <= 5 ? 'up' : 'down', icon: cancelledRate <= 5 ? TrendingUp : TrendingDown },
@@ -18,7 +18,7 @@ export default function AdminCustomers() {
       setStatus('loading');
       setError('');
       try {
-        const response = await fetchApi(buildApiUrl('/support/orders', { page: 1, limit: 50 }));
+        const response = await fetchApi(buildApiUrl('/support/orders', { limit: 50 }));
         if (!isMounted) return;
         const orders = response.orders ?? [];
         const customerMap = new Map();
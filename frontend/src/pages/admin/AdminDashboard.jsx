@@ -45,8 +45,6 @@ const formatPercentChange = (current, previous) => {
   return `${sign}${delta.toFixed(1)}%`;
 };
 
-const toDate = (value) => (value ? new Date(value) : null);
-
 /* Components */
 const StatCard = ({ icon: Icon, label, value, change, iconBg, theme }) => (
   <div
@@ -96,33 +94,18 @@ const getPeriodWindow = (days) => {
   return { start, end };
 };
 
-const sumOrdersInRange = (orders, start, end) =>
-  orders.reduce((acc, order) => {
-    const createdAt = toDate(order.createdAt);
-    if (!createdAt || createdAt < start || createdAt > end) return acc;
-    return acc + (Number(order.total) || 0);
-  }, 0);
+// Daily rollup points are UTC calendar days ("YYYY-MM-DD").
+const dayToDate = (day) => new Date(`${day}T00:00:00`);
 
-const countOrdersInRange = (orders, start, end) =>
-  orders.reduce((acc, order) => {
-    const createdAt = toDate(order.createdAt);
-    if (!createdAt || createdAt < start || createdAt > end) return acc;
-    return acc + 1;
+const sumRevenueInRange = (daily, start, end) =>
+  daily.reduce((acc, point) => {
+    const date = dayToDate(point.day);
+    if (date < start || date > end) return acc;
+    return acc + (Number(point.revenue) || 0);
   }, 0);
 
-const countUniqueCustomers = (orders, start, end) => {
-  const keys = new Set();
-  orders.forEach((order) => {
-    const createdAt = toDate(order.createdAt);
-    if (!createdAt || createdAt < start || createdAt > end) return;
-    const key = order.customerEmail || order.customerId || order.customerName || order.id;
-    if (key) keys.add(key);
-  });
-  return keys.size;
-};
-
-const buildSalesSeries = (orders, days, points = 20) => {
-  if (!orders.length) return [];
+const buildSalesSeries = (daily, days, points = 20) => {
+  if (!daily.length) return [];
   const { start, end } = getPeriodWindow(days);
   const bucketSize = Math.max(1, Math.ceil(days / points));
   const buckets = [];
@@ -143,8 +126,8 @@ const buildSalesSeries = (orders, days, points = 20) => {
 
     buckets.push({
       name: bucketStart.toLocaleDateString("en-US", { month: "short", day: "numeric" }),
-      sales1: sumOrdersInRange(orders, bucketStart, bucketEnd),
-      sales2: sumOrdersInRange(orders, prevStart, prevEnd),
+      sales1: sumRevenueInRange(daily, bucketStart, bucketEnd),
+      sales2: sumRevenueInRange(daily, prevStart, prevEnd),
     });
   }
 
@@ -160,10 +143,8 @@ export default function AdminDashboard() {
 
   const [dashboardStatus, setDashboardStatus] = useState("loading");
   const [dashboardError, setDashboardError] = useState("");
-  const [orders, setOrders] = useState([]);
-  const [ordersTotal, setOrdersTotal] = useState(0);
-  const [products, setProducts] = useState([]);
-  const [categories, setCategories] = useState([]);
+  const [recentOrders, setRecentOrders] = useState([]);
+  const [summary, setSummary] = useState(null);
 
   useEffect(() => {
     let isMounted = true;
@@ -171,38 +152,14 @@ export default function AdminDashboard() {
       setDashboardStatus("loading");
       setDashboardError("");
       try {
-        const pageLimit = 50;
-        const maxPages = 4;
-        const fetchOrdersPaged = async () => {
-          const firstPage = await fetchApi(buildApiUrl("/support/orders", { page: 1, limit: pageLimit }));
-          const totalPages = Math.min(firstPage.totalPages ?? 1, maxPages);
-          const pages = [firstPage];
-
-          if (totalPages > 1) {
-            const rest = await Promise.all(
-              Array.from({ length: totalPages - 1 }, (_, index) =>
-                fetchApi(buildApiUrl("/support/orders", { page: index + 2, limit: pageLimit }))
-              )
-            );
-            pages.push(...rest);
-          }
-
-          const combinedOrders = pages.flatMap((payload) => payload.orders ?? []);
-          const total = pages[0]?.total ?? combinedOrders.length;
-          return { orders: combinedOrders, total };
-        };
-
-        const [ordersPayload, productsPayload, categoriesPayload] = await Promise.all([
-          fetchOrdersPaged(),
-          fetchApi("/products"),
-          fetchApi("/categories"),
+        // The 6-month chart compares against the 6 months before it.
+        const [summaryPayload, recentPayload] = await Promise.all([
+          fetchApi(buildApiUrl("/analytics/summary", { days: 360, compareDays: 30 })),
+          fetchApi(buildApiUrl("/support/orders", { limit: 5 })),
         ]);
         if (!isMounted) return;
-        const fetchedOrders = ordersPayload.orders ?? [];
-        setOrders(fetchedOrders);
-        setOrdersTotal(ordersPayload.total ?? fetchedOrders.length);
-        setProducts(productsPayload.items ?? []);
-        setCategories(categoriesPayload.categories ?? []);
+        setSummary(summaryPayload);
+        setRecentOrders(recentPayload.orders ?? []);
         setDashboardStatus("success");
       } catch (error) {
         if (!isMounted) return;
@@ -222,40 +179,17 @@ export default function AdminDashboard() {
     setShowOrderModal(true);
   };
 
-  const sortedOrders = useMemo(() => {
-    return [...orders].sort((a, b) => {
-      const aDate = toDate(a.createdAt)?.getTime() ?? 0;
-      const bDate = toDate(b.createdAt)?.getTime() ?? 0;
-      return bDate - aDate;
-    });
-  }, [orders]);
-
-  const recentOrders = useMemo(() => sortedOrders.slice(0, 5), [sortedOrders]);
-
-  const totalRevenue = useMemo(() => {
-    return orders.reduce((sum, order) => sum + (Number(order.total) || 0), 0);
-  }, [orders]);
-
-  const totalCustomers = useMemo(() => countUniqueCustomers(orders, new Date(0), new Date()), [orders]);
-
-  const { currentOrdersCount, previousOrdersCount, currentRevenue, previousRevenue, currentCustomers, previousCustomers } = useMemo(() => {
-    const currentWindow = getPeriodWindow(30);
-    const previousEnd = new Date(currentWindow.start);
-    previousEnd.setDate(currentWindow.start.getDate() - 1);
-    previousEnd.setHours(23, 59, 59, 999);
-    const previousStart = new Date(previousEnd);
-    previousStart.setDate(previousEnd.getDate() - 29);
-    previousStart.setHours(0, 0, 0, 0);
-
-    return {
-      currentOrdersCount: countOrdersInRange(orders, currentWindow.start, currentWindow.end),
-      previousOrdersCount: countOrdersInRange(orders, previousStart, previousEnd),
-      currentRevenue: sumOrdersInRange(orders, currentWindow.start, currentWindow.end),
-      previousRevenue: sumOrdersInRange(orders, previousStart, previousEnd),
-      currentCustomers: countUniqueCustomers(orders, currentWindow.start, currentWindow.end),
-      previousCustomers: countUniqueCustomers(orders, previousStart, previousEnd),
-    };
-  }, [orders]);
+  const ordersTotal = summary?.totals.orders ?? 0;
+  const productsTotal = summary?.totals.products ?? 0;
+  const totalRevenue = summary?.totals.revenue ?? 0;
+  const totalCustomers = summary?.totals.customers ?? 0;
+
+  const currentOrdersCount = summary?.period.current.orders ?? 0;
+  const previousOrdersCount = summary?.period.previous.orders ?? 0;
+  const currentRevenue = summary?.period.current.revenue ?? 0;
+  const previousRevenue = summary?.period.previous.revenue ?? 0;
+  const currentCustomers = summary?.period.current.newCustomers ?? 0;
+  const previousCustomers = summary?.period.previous.newCustomers ?? 0;
 
   const stats = useMemo(() => [
     {
@@ -267,8 +201,8 @@ export default function AdminDashboard() {
     },
     {
       label: "Total Products",
-      value: products.length.toLocaleString("en-PK"),
-      change: products.length ? "Live" : "0%",
+      value: productsTotal.toLocaleString("en-PK"),
+      change: productsTotal ? "Live" : "0%",
       icon: Package,
       iconBg: "bg-purple-500",
     },
@@ -286,47 +220,34 @@ export default function AdminDashboard() {
       icon: Users,
       iconBg: "bg-orange-400",
     },
-  ], [currentCustomers, currentOrdersCount, currentRevenue, ordersTotal, previousCustomers, previousOrdersCount, previousRevenue, products.length, totalCustomers, totalRevenue]);
+  ], [currentCustomers, currentOrdersCount, currentRevenue, ordersTotal, previousCustomers, previousOrdersCount, previousRevenue, productsTotal, totalCustomers, totalRevenue]);
 
   const periodDays = useMemo(() => {
     const map = { month: 30, "3months": 90, "6months": 180 };
     return map[activeTab] ?? 30;
   }, [activeTab]);
 
-  const salesData = useMemo(() => buildSalesSeries(sortedOrders, periodDays), [periodDays, sortedOrders]);
+  const salesData = useMemo(() => buildSalesSeries(summary?.daily ?? [], periodDays), [periodDays, summary]);
 
   const topCategories = useMemo(() => {
-    if (!products.length && !categories.length) return [];
-    const categoryMap = new Map();
-    categories.forEach((cat) => {
-      categoryMap.set(cat.slug, { name: cat.name, count: 0 });
-    });
-    products.forEach((product) => {
-      const slug = product.categorySlug || product.category || product.categoryId;
-      const key = slug ? String(slug) : "uncategorized";
-      if (!categoryMap.has(key)) {
-        const label = key === "uncategorized" ? "Uncategorized" : key.charAt(0).toUpperCase() + key.slice(1);
-        categoryMap.set(key, { name: label, count: 0 });
-      }
-      const entry = categoryMap.get(key);
-      entry.count += 1;
-    });
-    const totalCount = Math.max(1, Array.from(categoryMap.values()).reduce((sum, item) => sum + item.count, 0));
-    return Array.from(categoryMap.values())
-      .sort((a, b) => b.count - a.count)
+    const rows = summary?.categories ?? [];
+    if (!rows.length) return [];
+    const totalCount = Math.max(1, rows.reduce((sum, item) => sum + item.products, 0));
+    return [...rows]
+      .sort((a, b) => b.products - a.products)
       .slice(0, 4)
       .map((cat, index) => {
         const palette = COLOR_PALETTE[index % COLOR_PALETTE.length];
         return {
           name: cat.name,
-          value: Math.round((cat.count / totalCount) * 100),
-          count: cat.count,
+          value: Math.round((cat.products / totalCount) * 100),
+          count: cat.products,
           color: palette.color,
           dotColor: palette.dotColor,
           hex: palette.hex,
         };
       });
-  }, [categories, products]);
+  }, [summary]);
 
   const donutSegments = useMemo(() => {
     const radius = 40;
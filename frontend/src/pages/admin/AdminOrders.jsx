@@ -1,4 +1,4 @@
-import React, { useEffect, useMemo, useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Eye, Download, Search } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import AdminSidebar from '../../components/admin/AdminSidebar';
@@ -29,6 +29,8 @@ export default function AdminOrders() {
   const [filterStatus, setFilterStatus] = useState('all');
   const [orders, setOrders] = useState([]);
   const [page, setPage] = useState(1);
+  // cursors[i] is the cursor that loads page i + 1 (the listing is keyset-paginated)
+  const [cursors, setCursors] = useState([null]);
   const [total, setTotal] = useState(0);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState('');
@@ -42,13 +44,18 @@ export default function AdminOrders() {
         const params = {
           q: searchTerm.trim() || undefined,
           status: filterStatus !== 'all' ? filterStatus : undefined,
-          page,
+          cursor: cursors[page - 1] ?? undefined,
           limit: LIMIT,
         };
         const response = await fetchApi(buildApiUrl('/support/orders', params));
         if (!isMounted) return;
         setOrders(response.orders ?? []);
         setTotal(response.total ?? 0);
+        setCursors((prev) => {
+          const next = prev.slice(0, page);
+          next[page] = response.nextCursor ?? null;
+          return next;
+        });
       } catch (err) {
         if (!isMounted) return;
         setError(err.message ?? 'Unable to load orders.');
@@ -61,22 +68,30 @@ export default function AdminOrders() {
     return () => {
       isMounted = false;
     };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [searchTerm, filterStatus, page]);
 
-  const totalPages = useMemo(() => Math.max(1, Math.ceil(total / LIMIT)), [total]);
+  const hasNextPage = Boolean(cursors[page]);
+
+  const resetPaging = () => {
+    setPage(1);
+    setCursors([null]);
+  };
 
   const handleSearchChange = (event) => {
     setSearchTerm(event.target.value);
-    setPage(1);
+    resetPaging();
   };
 
   const handleStatusChange = (event) => {
     setFilterStatus(event.target.value);
-    setPage(1);
+    resetPaging();
   };
 
   const handlePrev = () => setPage((prev) => Math.max(1, prev - 1));
-  const handleNext = () => setPage((prev) => Math.min(totalPages, prev + 1));
+  const handleNext = () => {
+    if (hasNextPage) setPage((prev) => prev + 1);
+  };
 
   return (
     <div className="flex h-screen bg-gradient-to-br from-slate-50 via-white to-slate-50">
@@ -208,7 +223,7 @@ export default function AdminOrders() {
                 </button>
                 <button
                   onClick={handleNext}
-                  disabled={page >= totalPages}
+                  disabled={!hasNextPage}
                   className="px-4 py-2 border border-slate-300 rounded-lg hover:bg-slate-50 hover:border-slate-400 transition font-semibold text-slate-700 shadow-sm hover:shadow-md disabled:opacity-50 disabled:cursor-not-allowed"
                 >
                   Next
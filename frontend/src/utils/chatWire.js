@@ -0,0 +1,26 @@
+// Compact response layout offered by the chatbot API (backend/chatbot/wire.py).
+// Lists of same-shaped objects arrive as { $cols, $rows, $const }; expand them
+// back into plain objects so components see the usual JSON shape.
+export const CHAT_ACCEPT = 'application/vnd.zaraara.columnar+json, application/json;q=0.9';
+
+function expand(value) {
+  if (Array.isArray(value)) return value.map(expand);
+  if (!value || typeof value !== 'object') return value;
+  if (Array.isArray(value.$cols) && Array.isArray(value.$rows)) {
+    const constant = value.$const ? expand(value.$const) : {};
+    return value.$rows.map((row) => {
+      const item = { ...constant };
+      value.$cols.forEach((col, i) => {
+        item[col] = expand(row[i]);
+      });
+      return item;
+    });
+  }
+  return Object.fromEntries(Object.entries(value).map(([k, v]) => [k, expand(v)]));
+}
+
+export async function readChatPayload(res) {
+  const payload = await res.json();
+  const columnar = (res.headers.get('Content-Type') || '').includes('columnar+json');
+  return columnar ? expand(payload) : payload;
+}